@@ -6,19 +6,372 @@
 
 import sys
 import os
+import glob
+import time
+import logging
+import hashlib
+import tempfile
+import threading
 
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import datetime
 import warnings
-warnings.filterwarnings('ignore')
+# 仅屏蔽akshare内部触发的告警，不再全局关闭告警
+warnings.filterwarnings('ignore', module=r'akshare(\.|$)')
 
-import akshare as ak
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from typing import Tuple, Optional
 
-sys.path.insert(0, os.path.abspath('./database'))
-from database.strategy_dao import StrategyDAO
-strategy_dao = StrategyDAO()
+DATABASE_DIR = os.path.abspath('./database')
+
+logger = logging.getLogger(__name__)
+
+# 标准OHLCV列名
+OHLCV_COLUMNS = ['开盘', '最高', '最低', '收盘', '成交量']
+# 行情接口可能返回的英文列名 -> 标准OHLCV列名（按优先级排列）
+OHLCV_COLUMN_ALIASES = {
+    'open': '开盘', 'high': '最高', 'low': '最低', 'close': '收盘', 'volume': '成交量',
+    'Open': '开盘', 'High': '最高', 'Low': '最低', 'Close': '收盘', 'Volume': '成交量',
+}
+
+# 行情数据磁盘缓存：目录及有效期（秒），同一区间当天内不重复请求akshare
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'stock_tools')
+CACHE_TTL_SECONDS = 24 * 60 * 60
+# 交易时段内当天数据仍在变化，含当天的缓存只保留1小时
+LIVE_CACHE_TTL_SECONDS = 60 * 60
+# A股收盘时刻（小时），收盘前写入的当天快照在收盘后即失效
+MARKET_CLOSE_HOUR = 16
+# 伦敦金夜间同样交易，当天的金价缓存任何时段都只保留5分钟
+GOLD_CACHE_TTL_SECONDS = 5 * 60
+# 磁盘缓存总大小上限（字节），超出后按最近访问时间淘汰
+CACHE_MAX_BYTES = 512 * 1024 * 1024
+# 进程内内存缓存有效期（秒），命中时连磁盘读取和反序列化也省掉
+MEMORY_CACHE_TTL_SECONDS = 5 * 60
+# 内存缓存最大条目数，写入时先清理过期条目，仍超出则淘汰最早写入的条目
+MEMORY_CACHE_MAXSIZE = 32
+# key -> (写入时间, DataFrame)
+_memory_cache = {}
+_memory_cache_lock = threading.Lock()
+
+# auth校验结果缓存：通过的结果缓存30秒（不超过auth剩余有效期），未通过的缓存5秒
+AUTH_CACHE_TTL_SECONDS = 30
+AUTH_NEG_CACHE_TTL_SECONDS = 5
+AUTH_CACHE_MAXSIZE = 10000
+# sha256(token)前16字节 -> (过期时间戳, (是否有效, 信息))
+_auth_cache = {}
+_auth_cache_lock = threading.RLock()
+# auth列长度上限（与建表语句varchar(100)一致），超长的auth不可能存在于数据库中
+AUTH_MAX_LENGTH = 100
+# auth删除标记/开关标记的取值（统一按大写比较）
+AUTH_DELETED_VALUES = frozenset({'T', 'Y', 'TRUE', 'ON', '1'})
+AUTH_SWITCH_OFF_VALUES = frozenset({'OFF', 'DISABLED'})
+# auth有效期字段校验规则：(字段名, 是否要求晚于当前时间, 不满足时的提示)
+AUTH_TIME_CHECKS = (
+    ('expire_time', True, 'auth已过期'),
+    ('end_time', True, 'auth已过期'),
+    ('start_time', False, 'auth尚未生效'),
+)
+
+
+@lru_cache(maxsize=1)
+def _dao():
+    """延迟获取共享的StrategyDAO：只有auth校验需要访问数据库，其他导入方不承担该开销"""
+    if 'database.strategy_dao' not in sys.modules and DATABASE_DIR not in sys.path:
+        sys.path.insert(0, DATABASE_DIR)
+    from database.strategy_dao import get_strategy_dao
+    return get_strategy_dao()
+
+
+@lru_cache(maxsize=None)
+def _ak():
+    """延迟导入akshare：导入耗时较长，仅在真正需要拉取行情时加载一次"""
+    import akshare as ak
+    return ak
+
+
+@lru_cache(maxsize=16)
+def _date_window(months: int, today_ordinal: int) -> Tuple[str, str, datetime]:
+    """
+    按月数计算行情日期窗口，同一天内同一months直接复用
+    
+    Args:
+        months (int): 月数
+        today_ordinal (int): 当天日期序号，跨天后缓存自然失效
+        
+    Returns:
+        tuple: (开始日期YYYYMMDD, 结束日期YYYYMMDD, 截止时间)
+    """
+    today = datetime.fromordinal(today_ordinal)
+    # 按自然月回推（而非months*30天近似）
+    cutoff = (today - pd.DateOffset(months=months)).to_pydatetime()
+    return cutoff.strftime('%Y%m%d'), today.strftime('%Y%m%d'), cutoff
+
+
+def _cache_path(key: str) -> str:
+    """缓存文件路径"""
+    return os.path.join(CACHE_DIR, f"{key}.pkl")
+
+
+def _cache_ttl(key: str, written_at: float) -> int:
+    """
+    缓存有效期（按文件写入时间判断，而不是读取时刻）
+    
+    - 不含当天日期的缓存：24小时
+    - 当天的金价缓存：5分钟
+    - 当天收盘前写入的股票缓存：收盘前1小时，收盘后立即失效
+    - 当天收盘后写入的股票缓存：24小时
+    """
+    now = datetime.now()
+    if now.strftime('%Y%m%d') not in key:
+        return CACHE_TTL_SECONDS
+    if key.startswith('XAU_'):
+        return GOLD_CACHE_TTL_SECONDS
+    market_close = now.replace(hour=MARKET_CLOSE_HOUR, minute=0, second=0, microsecond=0)
+    if written_at < market_close.timestamp():
+        return 0 if now >= market_close else LIVE_CACHE_TTL_SECONDS
+    return CACHE_TTL_SECONDS
+
+
+def _load_cached_frame(key: str) -> Optional[pd.DataFrame]:
+    """读取未过期的缓存数据，不存在/过期/损坏时返回None"""
+    path = _cache_path(key)
+    try:
+        written_at = os.path.getmtime(path)
+        if time.time() - written_at >= _cache_ttl(key, written_at):
+            return None
+        data = pd.read_pickle(path)
+        # 记录访问时间（保留mtime作为写入时间），供容量淘汰使用
+        os.utime(path, (time.time(), written_at))
+        return data
+    except Exception:
+        return None
+
+
+def _evict_cache() -> None:
+    """
+    删除过期缓存文件，总大小仍超过上限时按最近访问时间（LRU）淘汰
+    
+    每个代码（缓存键中第一个'_'之前的部分）最近写入的文件不按过期删除，
+    它是增量拉取的基础数据，隔天后仍需要用来拼接
+    """
+    try:
+        files = []
+        newest = {}
+        for entry in os.scandir(CACHE_DIR):
+            if not entry.name.endswith('.pkl'):
+                continue
+            stat = entry.stat()
+            prefix = entry.name.split('_', 1)[0]
+            files.append((prefix, stat, entry.path))
+            if prefix not in newest or stat.st_mtime > newest[prefix][0]:
+                newest[prefix] = (stat.st_mtime, entry.path)
+        
+        entries = []
+        now = time.time()
+        for prefix, stat, path in files:
+            if now - stat.st_mtime >= CACHE_TTL_SECONDS and path != newest[prefix][1]:
+                os.remove(path)
+            else:
+                entries.append((stat.st_atime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= CACHE_MAX_BYTES:
+                break
+            os.remove(path)
+            total -= size
+    except Exception as e:
+        logger.warning("清理行情缓存失败: %s", e)
+
+
+def _save_cached_frame(key: str, data: pd.DataFrame) -> None:
+    """写入缓存（先写临时文件再原子替换），失败不影响主流程"""
+    if data is None or data.empty:
+        return
+    path = _cache_path(key)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        # 临时文件名由mkstemp生成，同一进程内多个线程同时写同一key也互不覆盖
+        fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix='.tmp')
+        os.close(fd)
+        try:
+            data.to_pickle(tmp_path)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+    except Exception as e:
+        logger.warning("写入行情缓存失败: %s", e)
+        return
+    _evict_cache()
+
+
+def _set_memory_cached(key: str, data: pd.DataFrame) -> None:
+    """写入内存缓存：顺带清理过期条目，并限制条目数（按日期分键，长时间运行的进程不会无限增长）"""
+    now = time.time()
+    with _memory_cache_lock:
+        for expired in [k for k, (ts, _) in _memory_cache.items() if now - ts >= MEMORY_CACHE_TTL_SECONDS]:
+            del _memory_cache[expired]
+        _memory_cache.pop(key, None)
+        _memory_cache[key] = (now, data)
+        while len(_memory_cache) > MEMORY_CACHE_MAXSIZE:
+            del _memory_cache[next(iter(_memory_cache))]
+
+
+def _fetch_with_cache(key: str, fetch_func, use_cache: bool = True) -> pd.DataFrame:
+    """
+    两级缓存获取行情数据：内存缓存 -> 磁盘缓存 -> 调用fetch_func拉取
+    
+    use_cache=False时不读缓存、直接拉取，拉到的新数据仍会写回缓存；
+    返回的都是副本，调用方可以放心就地修改
+    """
+    if use_cache:
+        with _memory_cache_lock:
+            cached = _memory_cache.get(key)
+        if cached is not None and time.time() - cached[0] < MEMORY_CACHE_TTL_SECONDS:
+            return cached[1].copy()
+    
+    data = _load_cached_frame(key) if use_cache else None
+    if data is not None:
+        logger.debug("命中行情缓存: %s", key)
+    else:
+        data = fetch_func()
+        _save_cached_frame(key, data)
+    
+    if data is not None and not data.empty:
+        _set_memory_cached(key, data)
+        return data.copy()
+    return data
+
+
+def fetch_stock_hist(stock_code: str, months: int, use_cache: bool = True) -> pd.DataFrame:
+    """
+    拉取A股近N个月前复权日线原始数据（带两级缓存）
+    
+    CommonUtil与job.DataFetcher共用，同一区间只请求一次akshare；
+    use_cache=False时跳过缓存直接全量拉取（用于需要最新价格的场景）
+    """
+    start_date, end_date, _ = _date_window(months, datetime.now().toordinal())
+    if use_cache:
+        fetch_func = lambda: _fetch_stock_incremental(stock_code, start_date, end_date)
+    else:
+        fetch_func = lambda: _fetch_stock_raw(stock_code, start_date, end_date)
+    return _fetch_with_cache(f"{stock_code}_{start_date}_{end_date}", fetch_func, use_cache)
+
+
+def _fetch_stock_raw(stock_code: str, start_date: str, end_date: str) -> pd.DataFrame:
+    """调用akshare拉取A股前复权日线"""
+    return _ak().stock_zh_a_hist(
+        symbol=stock_code,
+        period="daily",
+        start_date=start_date,
+        end_date=end_date,
+        adjust="qfq"  # 前复权
+    )
+
+
+def _latest_cached_frame(prefix: str) -> Optional[pd.DataFrame]:
+    """读取指定前缀下最近写入的磁盘缓存（不校验有效期），没有时返回None"""
+    try:
+        paths = glob.glob(os.path.join(CACHE_DIR, f"{glob.escape(prefix)}_*.pkl"))
+        if not paths:
+            return None
+        return pd.read_pickle(max(paths, key=os.path.getmtime))
+    except Exception:
+        return None
+
+
+def _fetch_stock_incremental(stock_code: str, start_date: str, end_date: str) -> pd.DataFrame:
+    """
+    增量拉取A股日线：以该股票最近一次的磁盘缓存为基础，只补拉最近两根K线及之后的数据
+    
+    倒数第二根K线在缓存时已收盘，用它的收盘价校验前复权基准：除权后历史价格整体变化，
+    此时退回全量拉取；最后一根K线可能是盘中数据，始终以新数据为准
+    """
+    base = _latest_cached_frame(stock_code)
+    if base is None or len(base) < 2 or '日期' not in base.columns or '收盘' not in base.columns:
+        return _fetch_stock_raw(stock_code, start_date, end_date)
+    
+    base_dates = pd.to_datetime(base['日期'], format='%Y-%m-%d')
+    window_start = pd.Timestamp(start_date)
+    # 缓存的历史不足以覆盖窗口起点时全量拉取
+    if base_dates.iat[0] > window_start:
+        return _fetch_stock_raw(stock_code, start_date, end_date)
+    
+    check_date = base_dates.iat[-2]
+    new = _fetch_stock_raw(stock_code, check_date.strftime('%Y%m%d'), end_date)
+    if new is None or new.empty:
+        return _fetch_stock_raw(stock_code, start_date, end_date)
+    
+    new_dates = pd.to_datetime(new['日期'], format='%Y-%m-%d')
+    if new_dates.iat[0] != check_date or not np.isclose(float(new['收盘'].iat[0]), float(base['收盘'].iat[-2])):
+        return _fetch_stock_raw(stock_code, start_date, end_date)
+    
+    # 拼接缓存中已确认的K线与新数据，并截掉窗口起点之前的部分
+    keep = (base_dates < check_date) & (base_dates >= window_start)
+    return pd.concat([base[keep.to_numpy()], new], ignore_index=True)
+
+
+def fetch_gold_hist() -> pd.DataFrame:
+    """拉取伦敦金(XAU)全量历史原始数据（带两级缓存，接口返回全量历史，按当天日期作为缓存键）"""
+    return _fetch_with_cache(
+        f"XAU_{datetime.now().strftime('%Y%m%d')}",
+        lambda: _ak().futures_foreign_hist(symbol="XAU")
+    )
+
+
+def _auth_cache_key(token: str) -> bytes:
+    """auth缓存键：不在内存中保留明文token"""
+    return hashlib.sha256(token.encode('utf-8')).digest()[:16]
+
+
+def _get_cached_auth(key: bytes) -> Optional[Tuple[bool, str]]:
+    """读取未过期的auth校验结果，LRU语义：命中时移到末尾"""
+    with _auth_cache_lock:
+        cached = _auth_cache.pop(key, None)
+        if cached is None or cached[0] <= time.time():
+            return None
+        _auth_cache[key] = cached
+        return cached[1]
+
+
+def _set_cached_auth(key: bytes, result: Tuple[bool, str], ttl: float) -> None:
+    """写入auth校验结果，超出容量时淘汰最久未使用的条目"""
+    if ttl <= 0:
+        return
+    with _auth_cache_lock:
+        _auth_cache.pop(key, None)
+        _auth_cache[key] = (time.time() + ttl, result)
+        while len(_auth_cache) > AUTH_CACHE_MAXSIZE:
+            del _auth_cache[next(iter(_auth_cache))]
+
+
+def ohlcv_rename_map(columns) -> dict:
+    """
+    生成英文列名 -> 标准OHLCV列名的重命名映射
+    
+    已存在对应中文列的不重复映射，供一次性DataFrame.rename使用
+    """
+    rename_map = {}
+    for src, dst in OHLCV_COLUMN_ALIASES.items():
+        if src in columns and dst not in columns and dst not in rename_map.values():
+            rename_map[src] = dst
+    return rename_map
+
+
+def _ensure_numeric_ohlcv(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    入库时统一把OHLCV列转为数值类型，下游不再重复转换
+    
+    akshare正常返回的已是数值列，此时直接跳过；否则对需要转换的列一次性批量转换
+    """
+    columns = [col for col in OHLCV_COLUMNS
+               if col in data.columns and not pd.api.types.is_numeric_dtype(data[col])]
+    if columns:
+        data[columns] = data[columns].apply(pd.to_numeric, errors='coerce')
+    return data
+
 
 class CommonUtil:
     """工具类"""
@@ -32,51 +385,58 @@ class CommonUtil:
             return False, 'auth参数缺失或无效'
 
         token = auth.strip()
+        # 超过列长度的auth必然不存在，直接拒绝，不查库也不占用缓存
+        if len(token) > AUTH_MAX_LENGTH:
+            return False, 'auth格式无效'
 
-        # 1) 从数据库校验
+        key = _auth_cache_key(token)
+        cached = _get_cached_auth(key)
+        if cached is not None:
+            return cached
+
+        # 1) 从数据库校验（访问失败不缓存，下次请求重试）
         try:
-            record = strategy_dao.load_user_info_by_auth(token)
+            record = _dao().load_user_info_by_auth(token)
         except Exception as e:
             return False, f'数据库访问失败: {e}'
 
+        result = self._check_auth_record(record)
+        ttl = AUTH_NEG_CACHE_TTL_SECONDS
+        if result[0]:
+            ttl = AUTH_CACHE_TTL_SECONDS
+            # 缓存时间不超过auth剩余有效期，避免过期后仍返回通过
+            now = datetime.now()
+            for field, must_be_after_now, _ in AUTH_TIME_CHECKS:
+                value = getattr(record, field, None)
+                if must_be_after_now and isinstance(value, datetime):
+                    ttl = min(ttl, (value - now).total_seconds())
+        _set_cached_auth(key, result, ttl)
+        return result
+
+    @staticmethod
+    def _check_auth_record(record) -> Tuple[bool, str]:
+        """校验数据库中auth记录的业务字段"""
         if record is None:
             return False, 'auth不存在或未注册'
 
         # 2) 业务字段校验（若字段存在则校验）
         # 删除标记
         deleted = getattr(record, 'deleted', None)
-        if isinstance(deleted, str) and deleted.upper() in ('T', 'Y', 'TRUE', 'ON', '1'):
+        if isinstance(deleted, str) and deleted.upper() in AUTH_DELETED_VALUES:
             return False, 'auth已被禁用'
 
         # 开关标记（如有）
         switched = getattr(record, 'switched', None)
-        if isinstance(switched, str) and switched.upper() in ('OFF', 'DISABLED'):
+        if isinstance(switched, str) and switched.upper() in AUTH_SWITCH_OFF_VALUES:
             return False, 'auth已关闭'
 
-        # 有效期校验（优先使用 expire_time/end_time，如有）
+        # 有效期校验：一次遍历，只比较datetime类型的字段
+        # （start_time/end_time为TIME列时读出的是timedelta，不参与比较）
         now = datetime.now()
-        expire_time = getattr(record, 'expire_time', None)
-        end_time = getattr(record, 'end_time', None)
-
-        try:
-            if expire_time and isinstance(expire_time, datetime) and expire_time < now:
-                return False, 'auth已过期'
-        except Exception:
-            pass
-
-        try:
-            if end_time and isinstance(end_time, datetime) and end_time < now:
-                return False, 'auth已过期'
-        except Exception:
-            pass
-
-        # 若存在开始时间，且未来生效
-        start_time = getattr(record, 'start_time', None)
-        try:
-            if start_time and isinstance(start_time, datetime) and start_time > now:
-                return False, 'auth尚未生效'
-        except Exception:
-            pass
+        for field, must_be_after_now, message in AUTH_TIME_CHECKS:
+            value = getattr(record, field, None)
+            if isinstance(value, datetime) and (value < now if must_be_after_now else value > now):
+                return False, message
 
         return True, 'auth校验通过'
 
@@ -93,19 +453,9 @@ class CommonUtil:
         """
         print(f"📊 正在获取股票{stock_code}近{months}个月的历史数据...")
         
-        # 计算日期范围
-        end_date = datetime.now().strftime('%Y%m%d')
-        start_date = (datetime.now() - timedelta(days=months*30)).strftime('%Y%m%d')
-        
         try:
-            # 使用akshare获取股票数据
-            stock_data = ak.stock_zh_a_hist(
-                symbol=stock_code,
-                period="daily",
-                start_date=start_date,
-                end_date=end_date,
-                adjust="qfq"  # 前复权
-            )
+            # 使用akshare获取股票数据（带磁盘缓存）
+            stock_data = fetch_stock_hist(stock_code, months)
             
             if stock_data.empty:
                 print(f"❌ 未获取到股票{stock_code}的数据")
@@ -113,23 +463,44 @@ class CommonUtil:
             
             # 统一索引为日期，同时保留原'日期'列用于展示
             if '日期' in stock_data.columns:
-                stock_data['日期'] = pd.to_datetime(stock_data['日期'])
+                # akshare日期统一为YYYY-MM-DD，显式指定格式走快速解析路径
+                stock_data['日期'] = pd.to_datetime(stock_data['日期'], format='%Y-%m-%d')
                 stock_data = stock_data.set_index('日期', drop=False)
             elif not isinstance(stock_data.index, pd.DatetimeIndex):
                 print(f"⚠️ 股票{stock_code}索引不是DatetimeIndex，尝试转换...")
                 stock_data.index = pd.to_datetime(stock_data.index, errors='coerce')
             
             # 确保数据按时间正序排列
-            stock_data = stock_data.sort_index(ascending=True)
+            # akshare返回的数据通常已升序，仅在必要时排序（单调性判断有缓存）
+            if not stock_data.index.is_monotonic_increasing:
+                stock_data = stock_data.sort_index(ascending=True)
+            stock_data = _ensure_numeric_ohlcv(stock_data)
             
             print(f"✅ 成功获取股票{stock_code}的 {len(stock_data)} 条数据")
-            print(f"📈 数据时间范围: {stock_data['日期'].min()} 到 {stock_data['日期'].max()}")
+            # 已按时间正序排列，首尾即为起止时间，无需整列扫描
+            print(f"📈 数据时间范围: {stock_data.index[0]} 到 {stock_data.index[-1]}")
             return stock_data
             
         except Exception as e:
             print(f"❌ 获取股票{stock_code}数据出错: {e}")
             raise e
     
+    def get_stock_and_gold_data(self, months=6, stock_code='002155'):
+        """
+        并发获取股票与伦敦金历史数据（两者均为网络IO，线程并行可重叠等待时间）
+        
+        Args:
+            months (int): 获取数据的月数，默认6个月
+            stock_code (str): 股票代码，默认002155（湖南黄金）
+            
+        Returns:
+            tuple: (股票历史数据, 伦敦金历史数据)；股票数据获取失败时抛出异常，与get_stock_data一致
+        """
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            stock_future = executor.submit(self.get_stock_data, months, stock_code)
+            gold_future = executor.submit(self.get_gold_data, months)
+            return stock_future.result(), gold_future.result()
+    
     def get_gold_data(self, months=6):
         """
         获取伦敦金历史数据
@@ -141,87 +512,64 @@ class CommonUtil:
             pd.DataFrame: 伦敦金历史数据，包含OHLCV格式
         """
         print(f"🥇 正在获取伦敦金近{months}个月的历史数据...")
+        _, _, cutoff_date = _date_window(months, datetime.now().toordinal())
         
         try:
             # 使用伦敦金数据源
             print("使用伦敦金数据源 (XAU)...")
-            gold_data = ak.futures_foreign_hist(symbol="XAU")
+            gold_data = fetch_gold_hist()
             
             if gold_data.empty:
                 print("❌ 未获取到伦敦金数据")
                 return pd.DataFrame()
             
-            print(f"🔍 原始伦敦金数据列名: {gold_data.columns.tolist()}")
-            print(f"🔍 原始伦敦金数据形状: {gold_data.shape}")
-            print(f"🔍 原始伦敦金数据示例:")
-            print(gold_data.head(3))
+            # 原始数据调试信息（head()格式化开销较大，仅在DEBUG级别开启时输出）
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("原始伦敦金数据列名: %s, 形状: %s", gold_data.columns.tolist(), gold_data.shape)
+                logger.debug("原始伦敦金数据示例:\n%s", gold_data.head(3))
             
             # 数据预处理 - 适配futures_foreign_hist的数据格式
             # 该接口返回的是日度数据，需要转换为标准OHLCV格式
             if '日期' in gold_data.columns:
                 # 将日期转换为日期索引
-                gold_data['日期'] = pd.to_datetime(gold_data['日期'])
+                gold_data['日期'] = pd.to_datetime(gold_data['日期'], format='%Y-%m-%d')
                 gold_data = gold_data.set_index('日期')
             elif 'date' in gold_data.columns:
-                gold_data['date'] = pd.to_datetime(gold_data['date'])
+                gold_data['date'] = pd.to_datetime(gold_data['date'], format='%Y-%m-%d')
                 gold_data = gold_data.set_index('date')
             else:
                 # 如果没有日期列，使用索引
                 gold_data.index = pd.to_datetime(gold_data.index)
             
-            gold_data = gold_data.sort_index(ascending=True)  # 确保按时间正序排列
+            if not gold_data.index.is_monotonic_increasing:
+                gold_data = gold_data.sort_index(ascending=True)  # 确保按时间正序排列
             
             # 获取最近N个月的数据
-            cutoff_date = datetime.now() - timedelta(days=months*30)
-            gold_data = gold_data[gold_data.index >= cutoff_date]
-            
-            # 检查并映射列名到标准OHLCV格式
-            column_mapping = {
-                'open': '开盘',
-                'high': '最高',
-                'low': '最低', 
-                'close': '收盘',
-                'volume': '成交量'
-            }
-            
-            # 应用列名映射
-            for eng_col, chn_col in column_mapping.items():
-                if eng_col in gold_data.columns and chn_col not in gold_data.columns:
-                    gold_data[chn_col] = gold_data[eng_col]
-                    print(f"✅ 映射列 {eng_col} -> {chn_col}")
+            # 索引已升序，按区间切片（二分定位），无需构造整列布尔掩码
+            gold_data = gold_data.loc[cutoff_date:]
             
-            # 确保数据包含OHLCV列
-            required_columns = ['开盘', '最高', '最低', '收盘', '成交量']
-            missing_columns = [col for col in required_columns if col not in gold_data.columns]
+            # 英文列名一次性重命名为标准OHLCV列名（已有中文列的不覆盖）
+            rename_map = ohlcv_rename_map(gold_data.columns)
+            if rename_map:
+                gold_data = gold_data.rename(columns=rename_map)
+                logger.debug("映射列 %s", rename_map)
             
+            # 确保数据包含OHLCV列
+            missing_columns = [col for col in OHLCV_COLUMNS if col not in gold_data.columns]
             if missing_columns:
                 print(f"⚠️ 伦敦金数据缺少列: {missing_columns}")
                 print(f"🔍 可用列: {gold_data.columns.tolist()}")
-                # 如果缺少关键列，尝试从其他可能的列名获取
-                alternative_mappings = {
-                    'Open': '开盘',
-                    'High': '最高',
-                    'Low': '最低',
-                    'Close': '收盘',
-                    'Volume': '成交量'
-                }
-                
-                for alt_col, chn_col in alternative_mappings.items():
-                    if alt_col in gold_data.columns and chn_col not in gold_data.columns:
-                        gold_data[chn_col] = gold_data[alt_col]
-                        print(f"✅ 备用映射列 {alt_col} -> {chn_col}")
+            
+            gold_data = _ensure_numeric_ohlcv(gold_data)
             
             print(f"✅ 成功获取伦敦金 {len(gold_data)} 条数据")
             if not gold_data.empty:
-                print(f"📈 数据时间范围: {gold_data.index.min()} 到 {gold_data.index.max()}")
-                print(f"📊 最终列名: {gold_data.columns.tolist()}")
-                print(f"📊 最新收盘价: {gold_data['收盘'].iloc[-1] if '收盘' in gold_data.columns else 'N/A'}")
+                print(f"📈 数据时间范围: {gold_data.index[0]} 到 {gold_data.index[-1]}")
+                logger.debug("最终列名: %s", gold_data.columns.tolist())
             return gold_data
             
         except Exception as e:
-            print(f"❌ 获取伦敦金数据出错: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("获取伦敦金数据出错: %s", e)
             return pd.DataFrame()
 
 
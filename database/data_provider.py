@@ -16,12 +16,13 @@
 
 import sys
 import os
+import time
+import logging
+import threading
 
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-import warnings
-warnings.filterwarnings('ignore')
 
 # 导入图表相关库
 import plotly.graph_objects as go
@@ -32,11 +33,50 @@ BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 if BASE_DIR not in sys.path:
     sys.path.insert(0, BASE_DIR)
 
-from database.strategy_dao import StrategyDAO
+from database.strategy_dao import get_strategy_dao
 from database.table_entity import ToolStockToolsGold
 from common_util import CommonUtil
-strategy_dao = StrategyDAO()
+strategy_dao = get_strategy_dao()
 common_util = CommonUtil()
+logger = logging.getLogger(__name__)
+
+# 数据库策略状态的进程内缓存有效期（秒），连续的状态轮询复用同一次查询结果
+STATE_CACHE_TTL_SECONDS = 2.0
+# 已加载行情数据的有效期（秒），过期或股票代码/月数变化后重新加载
+DATA_CACHE_TTL_SECONDS = 5 * 60
+# 图表JSON缓存的最大条目数，超出后淘汰最早加入的条目
+CHART_CACHE_MAXSIZE = 16
+
+# 数据库无持仓数据时的默认持仓状态（模块级共享，调用方只读不修改）
+DEFAULT_POSITION = {
+    'has_position': False,
+    'buy_price': 0,
+    'shares': 0,
+    'amount': 0,
+    'current_profit_rate': 0,
+    'max_profit_rate': 0
+}
+
+def _moving_averages(close, windows=(5, 20)):
+    """基于一次累计和同时计算多个窗口的简单移动均线
+    
+    不足一个窗口的前几个位置以及窗口内含NaN的位置为NaN，与rolling(window).mean()一致。
+    返回 {窗口: 均线列表}。
+    """
+    values = np.asarray(close, dtype=float)
+    nan_mask = np.isnan(values)
+    csum = np.concatenate(([0.0], np.cumsum(np.where(nan_mask, 0.0, values))))
+    nan_count = np.concatenate(([0], np.cumsum(nan_mask)))
+    result = {}
+    for window in windows:
+        ma = np.full(values.size, np.nan)
+        if values.size >= window:
+            tail = (csum[window:] - csum[:-window]) / window
+            tail[nan_count[window:] - nan_count[:-window] > 0] = np.nan
+            ma[window - 1:] = tail
+        result[window] = ma.tolist()
+    return result
+
 
 class DataProvider:
     """
@@ -54,56 +94,131 @@ class DataProvider:
         # 懒加载数据容器
         self.stock_data = None
         self.gold_data = None
+        # 收盘价ndarray缓存（NaN已替换为0），随数据加载一起更新，状态查询时直接按下标读取
+        self._stock_closes = None
+        self._gold_closes = None
+        # 当前已加载数据对应的(股票代码, 月数)及加载时间（time.monotonic）
+        self._data_key = None
+        self._data_loaded_at = 0.0
+        # 实例由web_server各请求线程共享：以上数据字段只在锁内成组读取和替换
+        self._data_lock = threading.Lock()
+        # 最近一次成功写库的状态快照，内容未变化时跳过写库
+        self._last_saved_state = None
+        # 最近一次从数据库加载的状态及加载时间（time.monotonic）
+        self._state_cache = None
+        self._state_cache_ts = 0.0
+        # 最近交易日期字符串及其解析结果，日期不变时不重复strptime
+        self._trade_date_str = None
+        self._trade_date = None
+        # 图表JSON缓存：数据摘要 -> fig.to_json()结果，行情与交易点未变化时直接复用
+        self._chart_cache = {}
+        self._chart_cache_lock = threading.Lock()
         print("✅ 数据提供者初始化完成")
     
-    def get_current_status(self, stock_code='002155', months=6):
+    @staticmethod
+    def _closes(df):
+        """收盘价ndarray（NaN已替换为0），数据为空时返回None"""
+        if df is None or df.empty:
+            return None
+        return np.nan_to_num(df['收盘'].to_numpy(dtype=float), nan=0.0)
+    
+    def _load_data(self, stock_code, months, refresh=False):
         """
-        获取当前数据状态信息 - 基础信息模块的核心方法
+        获取(股票代码, 月数)对应的行情数据快照
         
-        计算并返回：
-        1. 当前股价和涨跌幅
-        2. 金价和涨跌幅
-        3. 数据统计信息
+        已加载的数据未过期且股票代码/月数一致时直接复用；否则拉取到局部变量，
+        成功后在锁内一次性替换共享字段，其他线程不会读到半更新或被置空的数据。
         
         Returns:
-            dict: 数据状态信息，包含所有关键指标
+            tuple: (股票数据, 金价数据, 股票收盘价ndarray, 金价收盘价ndarray)；股票数据加载失败时返回None
         """
-        # 懒加载数据
-        if self.stock_data is None or getattr(self.stock_data, 'empty', True):
+        data_key = (stock_code, months)
+        with self._data_lock:
+            fresh = (not refresh and data_key == self._data_key
+                     and time.monotonic() - self._data_loaded_at < DATA_CACHE_TTL_SECONDS)
+            if fresh:
+                stock_data, gold_data = self.stock_data, self.gold_data
+                stock_closes, gold_closes = self._stock_closes, self._gold_closes
+                loaded_at = self._data_loaded_at
+            else:
+                stock_data = gold_data = stock_closes = gold_closes = None
+                loaded_at = time.monotonic()
+        
+        # 懒加载数据（两者都需要加载时并发拉取）
+        need_stock = stock_data is None or stock_data.empty
+        need_gold = gold_data is None or gold_data.empty
+        if not need_stock and not need_gold:
+            return stock_data, gold_data, stock_closes, gold_closes
+        if need_stock and need_gold:
             try:
-                self.stock_data = common_util.get_stock_data(months=months, stock_code=stock_code)
+                stock_data, gold_data = common_util.get_stock_and_gold_data(months=months, stock_code=stock_code)
             except Exception as e:
-                print(f"❌ 加载股票数据失败: {e}")
-        if self.gold_data is None or getattr(self.gold_data, 'empty', True):
+                logger.error("加载股票数据失败: %s", e)
+        elif need_stock:
             try:
-                self.gold_data = common_util.get_gold_data(months=months)
+                stock_data = common_util.get_stock_data(months=months, stock_code=stock_code)
             except Exception as e:
-                print(f"❌ 加载金价数据失败: {e}")
-
-        print(f"🔍 获取基础数据状态: stock_data is None={self.stock_data is None}")
+                logger.error("加载股票数据失败: %s", e)
+        else:
+            try:
+                gold_data = common_util.get_gold_data(months=months)
+            except Exception as e:
+                logger.error("加载金价数据失败: %s", e)
         
-        if self.stock_data is None or self.stock_data.empty:
-            print("⚠️ 股票数据为空，返回None")
+        if stock_data is None or stock_data.empty:
             return None
+        if need_stock:
+            stock_closes = self._closes(stock_data)
+        if need_gold:
+            gold_closes = self._closes(gold_data)
+        
+        with self._data_lock:
+            self.stock_data, self.gold_data = stock_data, gold_data
+            self._stock_closes, self._gold_closes = stock_closes, gold_closes
+            self._data_key, self._data_loaded_at = data_key, loaded_at
+        return stock_data, gold_data, stock_closes, gold_closes
+    
+    def _parse_trade_date(self, last_trade_date):
+        """解析最近交易日期（YYYY-MM-DD），与上次相同时直接复用解析结果"""
+        if last_trade_date != self._trade_date_str:
+            self._trade_date = datetime.strptime(last_trade_date, '%Y-%m-%d')
+            self._trade_date_str = last_trade_date
+        return self._trade_date
+    
+    def get_current_status(self, stock_code='002155', months=6, refresh=False):
+        """
+        获取当前数据状态信息 - 基础信息模块的核心方法
+        
+        计算并返回：
+        1. 当前股价和涨跌幅
+        2. 金价和涨跌幅
+        3. 数据统计信息
         
-        # 清理NaN值的辅助函数
-        def clean_nan(value, default=0.0):
-            """清理NaN值，替换为默认值"""
-            import math
-            if isinstance(value, float) and math.isnan(value):
-                return default
-            return value
+        Args:
+            stock_code (str): 股票代码
+            months (int): 数据月数
+            refresh (bool): 是否忽略已加载的数据强制重新加载
         
-        # 调试数据
-        print(f"📊 股票数据形状: {self.stock_data.shape}")
-        print(f"📊 最新收盘价: {self.stock_data['收盘'].iloc[-1]}")
+        Returns:
+            dict: 数据状态信息，包含所有关键指标
+        """
+        # 股票代码/月数变化、数据过期或强制刷新时重新加载；之后只使用本次调用拿到的快照
+        data = self._load_data(stock_code, months, refresh)
+        if data is None:
+            logger.warning("股票数据为空，返回None")
+            return None
+        # 收盘价使用加载时缓存的ndarray，按下标直接读取，避免多次走pandas索引器
+        stock_data, gold_data, stock_closes, gold_closes = data
+        
+        # 调试数据（默认不输出，%参数仅在DEBUG级别开启时才格式化）
+        logger.debug("股票数据形状: %s, 最新收盘价: %s", stock_data.shape, stock_closes[-1])
         
         # 获取当前股价
-        current_price = clean_nan(self.stock_data['收盘'].iloc[-1])
+        current_price = float(stock_closes[-1])
         
         # 计算股价涨跌幅
-        if len(self.stock_data) > 1:
-            prev_price = clean_nan(self.stock_data['收盘'].iloc[-2])
+        if stock_closes.size > 1:
+            prev_price = float(stock_closes[-2])
             stock_change_rate = (current_price - prev_price) / prev_price if prev_price != 0 else 0
         else:
             stock_change_rate = 0
@@ -112,56 +227,42 @@ class DataProvider:
         gold_price = 0.0  # 默认金价
         gold_change_rate = 0.0  # 默认金价涨跌幅
         
-        if self.gold_data is not None and not self.gold_data.empty:
-            gold_price = clean_nan(self.gold_data['收盘'].iloc[-1])
-            print(f"📊 金价数据形状: {self.gold_data.shape}")
-            print(f"📊 最新金价: {gold_price}")
-            print(f"📊 金价数据索引: {self.gold_data.index[-3:].tolist()}")
-            print(f"📊 金价收盘价: {self.gold_data['收盘'].iloc[-3:].tolist()}")
+        if gold_data is not None and not gold_data.empty:
+            gold_price = float(gold_closes[-1])
+            logger.debug("金价数据形状: %s, 最新金价: %s", gold_data.shape, gold_price)
             
-            # 详细显示最近几天的数据
-            print(f"📊 最近5天金价数据详情:")
-            recent_data = self.gold_data.tail(5)
-            for i, (date, row) in enumerate(recent_data.iterrows()):
-                close_price = row.get('收盘', 'N/A')
-                print(f"  {i+1}. {date.strftime('%Y-%m-%d')}: 收盘价={close_price}")
+            logger.debug("最近5天金价收盘价: %s", gold_data['收盘'].tail(5))
             
-            if len(self.gold_data) > 1:
-                prev_gold_price = clean_nan(self.gold_data['收盘'].iloc[-2])
-                prev_date = self.gold_data.index[-2]
-                current_date = self.gold_data.index[-1]
+            if gold_closes.size > 1:
+                prev_gold_price = float(gold_closes[-2])
+                prev_date = gold_data.index[-2]
+                current_date = gold_data.index[-1]
                 
                 gold_change_rate = (gold_price - prev_gold_price) / prev_gold_price if prev_gold_price != 0 else 0
                 
-                print(f"📊 金价涨跌幅详细计算:")
-                print(f"  当前日期: {current_date.strftime('%Y-%m-%d')}")
-                print(f"  当前金价: {gold_price}")
-                print(f"  前一日日期: {prev_date.strftime('%Y-%m-%d')}")
-                print(f"  前一日金价: {prev_gold_price}")
-                print(f"  涨跌金额: {gold_price - prev_gold_price}")
-                print(f"  涨跌幅计算: ({gold_price} - {prev_gold_price}) / {prev_gold_price} = {gold_change_rate:.6f} = {gold_change_rate*100:.4f}%")
+                logger.debug("金价涨跌幅计算: %s %s -> %s %s, 涨跌幅=%.6f",
+                             prev_date, prev_gold_price, current_date, gold_price, gold_change_rate)
                 
                 # 检查数据合理性
                 if abs(gold_change_rate) > 0.1:  # 涨跌幅超过10%
-                    print(f"⚠️ 警告: 金价涨跌幅异常大 ({gold_change_rate*100:.2f}%)")
+                    logger.warning("金价涨跌幅异常大 (%.2f%%)", gold_change_rate * 100)
                 if prev_gold_price == gold_price:
-                    print(f"⚠️ 警告: 前一日金价与当前金价相同，可能数据有问题")
+                    logger.warning("前一日金价与当前金价相同，可能数据有问题")
                     
             else:
-                print("⚠️ 金价数据不足，无法计算涨跌幅")
+                logger.warning("金价数据不足，无法计算涨跌幅")
         else:
-            print("⚠️ 金价数据为空，使用默认值")
+            logger.warning("金价数据为空，使用默认值")
         
         # 从数据库加载持久化数据
         persistent_data = self.load_state_from_database()
-        print(f"📊 从数据库加载的持久化数据: {persistent_data}")
+        logger.debug("从数据库加载的持久化数据: %s", persistent_data)
         
         # 计算总资产和投资成本 - 确保数据类型一致
         total_shares = float(persistent_data.get('total_shares', 0))
         total_cost = float(persistent_data.get('total_cost', 0))
         # 总资产 = 当前市值（可卖出的价值）
         total_assets = current_price * total_shares  # 当前市值
-        current_market_value = current_price * total_shares  # 当前市值（与total_assets相同）
         
         # 计算收益率
         if total_cost > 0:
@@ -172,7 +273,7 @@ class DataProvider:
         # 计算年化收益率
         last_trade_date = persistent_data.get('last_trade_date', '2025-01-01')
         try:
-            trade_date = datetime.strptime(last_trade_date, '%Y-%m-%d')
+            trade_date = self._parse_trade_date(last_trade_date)
             current_date = datetime.now()
             investment_days = (current_date - trade_date).days
             if investment_days <= 0:
@@ -185,9 +286,12 @@ class DataProvider:
         else:
             annual_return = 0
             
-        print(f"📊 计算数据: total_shares={total_shares}, total_cost={total_cost}, total_assets={total_assets}")
-        print(f"📊 投资天数: {investment_days}天")
-        print(f"📊 收益率计算: cumulative_return={cumulative_return:.4f}, annual_return={annual_return:.4f}")
+        logger.debug("计算数据: total_shares=%s, total_cost=%s, total_assets=%s, 投资天数=%s, "
+                     "cumulative_return=%.4f, annual_return=%.4f",
+                     total_shares, total_cost, total_assets, investment_days, cumulative_return, annual_return)
+        
+        # 股票数据已按时间正序排列，首尾即为日期范围
+        start_ts, end_ts = stock_data.index[0], stock_data.index[-1]
         
         # 构建状态信息
         status = {
@@ -199,30 +303,21 @@ class DataProvider:
             'total_assets': total_assets,  # 当前市值
             
             # 系统信息
-            'data_points': len(self.stock_data),
+            'data_points': len(stock_data),
             'date_range': {
-                'start': (self.stock_data.index.min().strftime('%Y-%m-%d')
-                          if isinstance(self.stock_data.index.min(), pd.Timestamp) else str(self.stock_data.index.min())),
-                'end': (self.stock_data.index.max().strftime('%Y-%m-%d')
-                        if isinstance(self.stock_data.index.max(), pd.Timestamp) else str(self.stock_data.index.max()))
+                'start': start_ts.strftime('%Y-%m-%d') if isinstance(start_ts, pd.Timestamp) else str(start_ts),
+                'end': end_ts.strftime('%Y-%m-%d') if isinstance(end_ts, pd.Timestamp) else str(end_ts)
             },
             
             # 持久化数据
-            'total_cost': persistent_data.get('total_cost', 0),
+            'total_cost': total_cost,
             'total_shares': total_shares,
             'cumulative_return': cumulative_return,  # 使用计算出的收益率
             'annual_return': annual_return,  # 使用计算出的年化收益率
-            'position': persistent_data.get('position', {
-                'has_position': False,
-                'buy_price': 0,
-                'shares': 0,
-                'amount': 0,
-                'current_profit_rate': 0,
-                'max_profit_rate': 0
-            })
+            'position': persistent_data.get('position', DEFAULT_POSITION)
         }
         
-        print(f"📊 基础数据状态计算完成: 股价={current_price:.2f}, 涨跌={stock_change_rate:.4f}")
+        logger.debug("基础数据状态计算完成: 股价=%.2f, 涨跌=%.4f", current_price, stock_change_rate)
         
         # 保存状态到数据库
         self.save_state_to_database(status)
@@ -236,6 +331,8 @@ class DataProvider:
         Returns:
             dict: 策略状态数据
         """
+        if self._state_cache is not None and time.monotonic() - self._state_cache_ts < STATE_CACHE_TTL_SECONDS:
+            return self._state_cache
         try:
             strategy = strategy_dao.load_user_info_by_auth(self.default_auth)
             if strategy:
@@ -244,20 +341,20 @@ class DataProvider:
                     'total_shares': float(strategy.total_shares),
                     'history_max_profit': float(strategy.history_max_profit),
                     'last_total_profit': float(strategy.last_total_profit),
+                    # 交易历史JSON可能很大且状态查询不使用，不在此解析
                     'position': strategy.get_position_dict(),
-                    'trade_history': strategy.get_trade_history_list(),
                     'last_trade_date': strategy.last_trade_date.strftime('%Y-%m-%d') if strategy.last_trade_date else '',
                     'save_time': strategy.update_time.strftime('%Y-%m-%d %H:%M:%S') if strategy.update_time else ''
                 }
-                print(f"📂 从数据库加载状态: {data}")
+                logger.debug("从数据库加载状态: %s", data)
+                self._state_cache = data
+                self._state_cache_ts = time.monotonic()
                 return data
             else:
-                print("⚠️ 数据库中没有策略数据，使用默认值")
+                logger.warning("数据库中没有策略数据，使用默认值")
                 return {}
-        except Exception as e:
-            print(f"❌ 从数据库加载状态失败: {e}")
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            logger.exception("从数据库加载状态失败")
             return {}
     
     def save_state_to_database(self, status):
@@ -291,16 +388,25 @@ class DataProvider:
             strategy.updater = 'system'
             strategy.creator = 'system'
             
+            # 与上次写入的内容相同则跳过，状态轮询时不再重复序列化和写库
+            state_snapshot = (strategy.total_cost, strategy.total_shares, strategy.history_max_profit,
+                              strategy.last_total_profit, strategy.position, strategy.trade_history,
+                              strategy.last_trade_date)
+            if state_snapshot == self._last_saved_state:
+                logger.debug("状态未变化，跳过写库")
+                return
+            
             # 保存到数据库
             success = strategy_dao.save_user_info(strategy)
             if success:
-                print(f"💾 状态已保存到数据库: 投资成本={strategy.total_cost}, 持股数={strategy.total_shares}")
+                self._last_saved_state = state_snapshot
+                # 数据库内容已更新，下次加载重新查询
+                self._state_cache = None
+                logger.debug("状态已保存到数据库: 投资成本=%s, 持股数=%s", strategy.total_cost, strategy.total_shares)
             else:
-                print("❌ 保存到数据库失败")
-        except Exception as e:
-            print(f"❌ 保存到数据库失败: {e}")
-            import traceback
-            traceback.print_exc()
+                logger.error("保存到数据库失败")
+        except Exception:
+            logger.exception("保存到数据库失败")
     
     def calculate_cumulative_return(self, existing_state, current_status):
         """
@@ -342,8 +448,35 @@ class DataProvider:
         except Exception:
             return 0
     
+    @staticmethod
+    def _frame_signature(df):
+        """行情数据的廉价摘要（O(1)）：行数、首尾日期及最后一根K线的OHLCV，盘中最新K线任一字段变化时摘要随之变化"""
+        if df is None or df.empty:
+            return None
+        last_bar = tuple(float(df[col].iat[-1]) for col in ('开盘', '最高', '最低', '收盘', '成交量') if col in df.columns)
+        return (len(df), df.index[0].value, df.index[-1].value, last_bar)
+    
     def create_chart_data(self, data, gold_data=None, trade_points=None):
-        """创建专业图表数据 - 支持双K线图显示"""
+        """创建专业图表数据 - 支持双K线图显示（相同数据重复请求时返回缓存的JSON）"""
+        cache_key = (
+            self._frame_signature(data),
+            self._frame_signature(gold_data),
+            tuple((p.get('date'), p.get('action'), p.get('price')) for p in trade_points or ()),
+        )
+        with self._chart_cache_lock:
+            chart_json = self._chart_cache.get(cache_key)
+        if chart_json is None:
+            chart_json = self._build_chart_json(data, gold_data, trade_points)
+            # 实例由web_server各请求线程共享，淘汰与写入在锁内完成
+            with self._chart_cache_lock:
+                self._chart_cache.pop(cache_key, None)
+                while len(self._chart_cache) >= CHART_CACHE_MAXSIZE:
+                    del self._chart_cache[next(iter(self._chart_cache))]
+                self._chart_cache[cache_key] = chart_json
+        return chart_json
+    
+    def _build_chart_json(self, data, gold_data=None, trade_points=None):
+        """构建K线图（股票、伦敦金、成交量）并序列化为JSON"""
         
         stock_name = ""
 
@@ -366,130 +499,115 @@ class DataProvider:
             )
         
         # 添加K线图 - 按照标准示例格式
-        # 将pandas数据转换为标准格式
-        kline_data = {
-            'date': data.index.strftime('%Y-%m-%d').tolist(),
-            'open': data['开盘'].tolist(),
-            'high': data['最高'].tolist(),
-            'low': data['最低'].tolist(),
-            'close': data['收盘'].tolist()
-        }
+        # 日期列表只生成一次，K线、均线、成交量共用
+        dates = data.index.strftime('%Y-%m-%d').tolist()
+        close = data['收盘']
+        
+        # 各子图的trace先收集为(trace, 行号)，最后一次性加入图表
+        traces = []
         
         # 添加K线图 - 使用标准格式，隐藏底部缩略图
-        fig.add_trace(go.Candlestick(
-            x=kline_data['date'],        # 时间序列
-            open=kline_data['open'],     # 开盘价
-            high=kline_data['high'],     # 最高价
-            low=kline_data['low'],       # 最低价
-            close=kline_data['close'],   # 收盘价
+        traces.append((go.Candlestick(
+            x=dates,                      # 时间序列
+            open=data['开盘'].tolist(),   # 开盘价
+            high=data['最高'].tolist(),   # 最高价
+            low=data['最低'].tolist(),    # 最低价
+            close=close.tolist(),         # 收盘价
             name='股票K线'
-        ))
+        ), 1))
         
-        # 添加移动平均线 - 使用标准格式
+        # 添加移动平均线 - 使用标准格式（MA5、MA20一次累计和算出）
+        ma = _moving_averages(close.to_numpy())
         if len(data) >= 5:
-            ma5 = data['收盘'].rolling(window=5).mean()
-            ma5_data = {
-                'date': data.index.strftime('%Y-%m-%d').tolist(),
-                'ma5': ma5.tolist()
-            }
-            fig.add_trace(
+            traces.append((
                 go.Scatter(
-                    x=ma5_data['date'],
-                    y=ma5_data['ma5'],
+                    x=dates,
+                    y=ma[5],
                     mode='lines',
                     name='MA5',
                     line=dict(color='blue', width=2)
                 ),
-                row=1, col=1
-            )
+                1
+            ))
         if len(data) >= 20:
-            ma20 = data['收盘'].rolling(window=20).mean()
-            ma20_data = {
-                'date': data.index.strftime('%Y-%m-%d').tolist(),
-                'ma20': ma20.tolist()
-            }
-            fig.add_trace(
+            traces.append((
                 go.Scatter(
-                    x=ma20_data['date'],
-                    y=ma20_data['ma20'],
+                    x=dates,
+                    y=ma[20],
                     mode='lines',
                     name='MA20',
                     line=dict(color='orange', width=2)
                 ),
-                row=1, col=1
-            )
+                1
+            ))
         
         # 添加伦敦金K线图
         if gold_data is not None and not gold_data.empty:
             required_columns = ['开盘', '最高', '最低', '收盘']
             missing_columns = [col for col in required_columns if col not in gold_data.columns]
             if not missing_columns:
-                gold_kline_data = {
-                    'date': gold_data.index.strftime('%Y-%m-%d').tolist(),
-                    'open': gold_data['开盘'].tolist(),
-                    'high': gold_data['最高'].tolist(),
-                    'low': gold_data['最低'].tolist(),
-                    'close': gold_data['收盘'].tolist()
-                }
-                fig.add_trace(go.Candlestick(
-                    x=gold_kline_data['date'],
-                    open=gold_kline_data['open'],
-                    high=gold_kline_data['high'],
-                    low=gold_kline_data['low'],
-                    close=gold_kline_data['close'],
+                gold_dates = gold_data.index.strftime('%Y-%m-%d').tolist()
+                traces.append((go.Candlestick(
+                    x=gold_dates,
+                    open=gold_data['开盘'].tolist(),
+                    high=gold_data['最高'].tolist(),
+                    low=gold_data['最低'].tolist(),
+                    close=gold_data['收盘'].tolist(),
                     name='伦敦金',
                     increasing_line_color='red',
                     decreasing_line_color='green',
-                ), row=2, col=1)
+                ), 2))
+                gold_ma = _moving_averages(gold_data['收盘'].to_numpy())
                 if len(gold_data) >= 5:
-                    gold_ma5 = gold_data['收盘'].rolling(window=5).mean()
-                    fig.add_trace(go.Scatter(
-                        x=gold_kline_data['date'],
-                        y=gold_ma5.tolist(),
+                    traces.append((go.Scatter(
+                        x=gold_dates,
+                        y=gold_ma[5],
                         mode='lines',
                         name='伦敦金MA5',
                         line=dict(color='blue', width=2)
-                    ), row=2, col=1)
+                    ), 2))
                 if len(gold_data) >= 20:
-                    gold_ma20 = gold_data['收盘'].rolling(window=20).mean()
-                    fig.add_trace(go.Scatter(
-                        x=gold_kline_data['date'],
-                        y=gold_ma20.tolist(),
+                    traces.append((go.Scatter(
+                        x=gold_dates,
+                        y=gold_ma[20],
                         mode='lines',
                         name='伦敦金MA20',
                         line=dict(color='orange', width=2)
-                    ), row=2, col=1)
+                    ), 2))
 
         # 添加交易点标识
         if trade_points and len(trade_points) > 0:
             buy_points = [p for p in trade_points if p.get('action') == 'BUY']
             sell_points = [p for p in trade_points if p.get('action') == 'SELL']
             if buy_points:
-                fig.add_trace(go.Scatter(
+                traces.append((go.Scatter(
                     x=[p['date'] for p in buy_points],
                     y=[p['price'] for p in buy_points],
                     mode='markers',
                     name='买入点',
                     marker=dict(symbol='triangle-up', size=15, color='red', line=dict(width=2, color='darkred'))
-                ), row=1, col=1)
+                ), 1))
             if sell_points:
-                fig.add_trace(go.Scatter(
+                traces.append((go.Scatter(
                     x=[p['date'] for p in sell_points],
                     y=[p['price'] for p in sell_points],
                     mode='markers',
                     name='卖出点',
                     marker=dict(symbol='triangle-down', size=15, color='green', line=dict(width=2, color='darkgreen'))
-                ), row=1, col=1)
+                ), 1))
         
         # 成交量
-        colors = ['red' if c >= o else 'green' for c, o in zip(data['收盘'], data['开盘'])]
+        # 涨跌颜色向量化判断，再转成列表交给前端
+        colors = np.where(close.to_numpy() >= data['开盘'].to_numpy(), 'red', 'green').tolist()
         volume_row = 3 if (gold_data is not None and not gold_data.empty) else 2
-        fig.add_trace(go.Bar(
-            x=kline_data['date'],
+        traces.append((go.Bar(
+            x=dates,
             y=data['成交量'].tolist(),
             name='成交量',
             marker=dict(color=colors, opacity=0.7)
-        ), row=volume_row, col=1)
+        ), volume_row))
+
+        fig.add_traces([trace for trace, _ in traces], rows=[row for _, row in traces], cols=1)
 
         # 布局
         if gold_data is not None and not gold_data.empty:
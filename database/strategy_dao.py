@@ -9,8 +9,10 @@ import pymysql
 import pymysql.cursors
 from typing import Optional
 from datetime import datetime
+from functools import lru_cache, wraps
 import logging
 import sys
+import threading
 
 try:
     from .table_entity import ToolStockToolsGold
@@ -35,6 +37,28 @@ password='root'
 database='wisehair'
 port=3306
 
+# save_user_info可更新的列（值为None的列不更新）
+SAVE_USER_INFO_COLUMNS = (
+    'total_cost', 'total_shares', 'history_max_profit', 'last_total_profit',
+    'position', 'trade_history', 'last_trade_date',
+)
+
+# 加载用户信息时查询的列（只取调用方用到的列，updater/creator/create_time不查询）
+LOAD_USER_INFO_COLUMNS = (
+    'tool_stock_tools_gold_id', 'auth', 'expire_time', 'deleted', 'update_time',
+    'start_time', 'end_time', 'switched',
+) + SAVE_USER_INFO_COLUMNS
+
+
+def _synchronized(method):
+    """同一DAO实例上的数据库操作串行执行（实例在多个模块、线程间共享，连接和游标保存在实例上）"""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
 class StrategyDAO:
     """量化交易策略数据访问对象"""
     
@@ -42,11 +66,22 @@ class StrategyDAO:
         """初始化数据库连接参数"""
         self.connection = None
         self.cursor = None
+        self._lock = threading.RLock()
         
         logger.info(f"数据库配置: {host}:{port}, 用户: {user}, 数据库: {database}")
     
     def connect(self) -> bool:
-        """建立数据库连接"""
+        """建立数据库连接（已有连接时直接复用，ping检测断线并自动重连）"""
+        if self.connection is not None:
+            try:
+                self.connection.ping(reconnect=True)
+                if self.cursor is None:
+                    self.cursor = self.connection.cursor()
+                return True
+            except Exception as e:
+                logger.warning(f"数据库连接已失效，重新建立连接: {e}")
+                self.disconnect()
+        
         try:
             logger.info("正在连接数据库...")
             logger.info(f"连接参数: host={host}, port={port}, user={user}, database={database}")
@@ -58,7 +93,9 @@ class StrategyDAO:
                 password=password,
                 database=database,
                 charset='utf8mb4',
-                cursorclass=pymysql.cursors.DictCursor
+                cursorclass=pymysql.cursors.DictCursor,
+                # 长连接复用时开启自动提交，避免查询停留在旧的事务快照中读不到最新数据
+                autocommit=True
             )
             
             self.cursor = self.connection.cursor()
@@ -66,9 +103,7 @@ class StrategyDAO:
             return True
                 
         except Exception as e:
-            logger.error(f"数据库连接失败: {e}")
-            import traceback
-            logger.error(f"错误详情: {traceback.format_exc()}")
+            logger.exception(f"数据库连接失败: {e}")
             return False
     
     def disconnect(self) -> None:
@@ -81,65 +116,28 @@ class StrategyDAO:
                 logger.info("数据库连接已关闭")
         except Exception as e:
             logger.error(f"关闭数据库连接时出错: {e}")
+        finally:
+            self.connection = None
+            self.cursor = None
     
+    @_synchronized
     def save_user_info(self, strategy_data: ToolStockToolsGold) -> bool:
         """保存用户信息"""
         try:
             if not self.connect():
                 return False
             
-            # 检查记录是否存在 - 处理null值情况
-            where_conditions = []
-            where_values = []
-            
+            # 按主键直接UPDATE：记录不存在时影响0行，无需先SELECT判断；没有主键时无法定位记录，不做更新
             if strategy_data.tool_stock_tools_gold_id is not None:
-                where_conditions.append("tool_stock_tools_gold_id = %s")
-                where_values.append(strategy_data.tool_stock_tools_gold_id)
-            
-            if strategy_data.auth is not None and strategy_data.auth != '':
-                where_conditions.append("auth = %s")
-                where_values.append(strategy_data.auth)
-            
-            if where_conditions:
-                sql = f"SELECT * FROM tool_stock_tools_gold WHERE {' OR '.join(where_conditions)}"
-                self.cursor.execute(sql, where_values)
-                existing_data = self.cursor.fetchone()
-            else:
-                existing_data = None
-            
-            if existing_data:
                 update_fields = []
                 update_values = []
                 
-                # 检查每个字段是否有值，有值才加入更新列表
-                if strategy_data.total_cost is not None:
-                    update_fields.append("total_cost = %s")
-                    update_values.append(strategy_data.total_cost)
-                
-                if strategy_data.total_shares is not None:
-                    update_fields.append("total_shares = %s")
-                    update_values.append(strategy_data.total_shares)
-                
-                if strategy_data.history_max_profit is not None:
-                    update_fields.append("history_max_profit = %s")
-                    update_values.append(strategy_data.history_max_profit)
-                
-                if strategy_data.last_total_profit is not None:
-                    update_fields.append("last_total_profit = %s")
-                    update_values.append(strategy_data.last_total_profit)
-                
-                if strategy_data.position is not None:
-                    update_fields.append("position = %s")
-                    update_values.append(strategy_data.position)
-                
-                if strategy_data.trade_history is not None:
-                    update_fields.append("trade_history = %s")
-                    update_values.append(strategy_data.trade_history)
-                
-                # 处理last_trade_date空值情况
-                if strategy_data.last_trade_date is not None:
-                    update_fields.append("last_trade_date = %s")
-                    update_values.append(strategy_data.last_trade_date)
+                # 检查每个字段是否有值，有值才加入更新列表（含last_trade_date空值情况）
+                for column in SAVE_USER_INFO_COLUMNS:
+                    value = getattr(strategy_data, column)
+                    if value is not None:
+                        update_fields.append(f"{column} = %s")
+                        update_values.append(value)
                 
                 # 总是更新update_time
                 update_fields.append("update_time = %s")
@@ -148,13 +146,12 @@ class StrategyDAO:
                 # 添加WHERE条件的参数
                 update_values.append(strategy_data.tool_stock_tools_gold_id)
                 
-                if update_fields:
-                    sql = f"""
-                    UPDATE tool_stock_tools_gold SET
-                        {', '.join(update_fields)}
-                    WHERE tool_stock_tools_gold_id = %s
-                    """
-                    self.cursor.execute(sql, update_values)
+                sql = f"""
+                UPDATE tool_stock_tools_gold SET
+                    {', '.join(update_fields)}
+                WHERE tool_stock_tools_gold_id = %s
+                """
+                self.cursor.execute(sql, update_values)
             
             self.connection.commit()
             logger.info("策略状态保存成功")
@@ -162,99 +159,74 @@ class StrategyDAO:
             
         except Exception as e:
             logger.error(f"保存策略状态失败: {e}")
-            return False
-        finally:
+            # 出错后丢弃连接，下次调用重新建立
             self.disconnect()
+            return False
     
     def load_user_info_by_id(self, tool_stock_tools_gold_id: int) -> Optional[ToolStockToolsGold]:
         """按照用户id加载用户信息"""
-        try:
-            if not self.connect():
-                return None
-            
-            self.cursor.execute(
-                "SELECT * FROM tool_stock_tools_gold WHERE tool_stock_tools_gold_id = %s",
-                (tool_stock_tools_gold_id,)
-            )
-            result = self.cursor.fetchone()
-            
-            if result:
-                strategy_data = ToolStockToolsGold(
-                    tool_stock_tools_gold_id=result['tool_stock_tools_gold_id'],
-                    auth=result.get('auth', ''),
-                    expire_time=result.get('expire_time'),
-                    deleted=result.get('deleted', 'F'),
-                    updater=result.get('updater', ''),
-                    creator=result.get('creator', ''),
-                    update_time=result.get('update_time'),
-                    create_time=result.get('create_time'),
-                    start_time=result.get('start_time'),
-                    end_time=result.get('end_time'),
-                    switched=result.get('switched', ''),
-                    total_cost=result.get('total_cost', 0.0),
-                    total_shares=result.get('total_shares', 0),
-                    history_max_profit=result.get('history_max_profit', 0.0),
-                    last_total_profit=result.get('last_total_profit', 0.0),
-                    position=result.get('position', '{}'),
-                    trade_history=result.get('trade_history', '[]'),
-                    last_trade_date=result.get('last_trade_date')
-                )
-                logger.info("用户信息加载成功")
-                return strategy_data
-            else:
-                logger.info("未找到用户信息记录")
-                return None
-                
-        except Exception as e:
-            logger.error(f"加载策略状态失败: {e}")
-            return None
-        finally:
-            self.disconnect()
+        return self._load_user_info("tool_stock_tools_gold_id", tool_stock_tools_gold_id, "加载策略状态失败")
 
     def load_user_info_by_auth(self, auth: str) -> Optional[ToolStockToolsGold]:
         """按照auth加载用户信息"""
+        return self._load_user_info("auth", auth, "加载用户信息失败")
+
+    @_synchronized
+    def _load_user_info(self, column: str, value, error_message: str) -> Optional[ToolStockToolsGold]:
+        """按指定列查询单条用户信息（column只能由本类内部传入固定列名）"""
         try:
             if not self.connect():
                 return None
             
+            # auth和主键上均有唯一索引，按索引定位单行
             self.cursor.execute(
-                "SELECT * FROM tool_stock_tools_gold WHERE auth = %s",
-                (auth,)
+                f"SELECT {', '.join(LOAD_USER_INFO_COLUMNS)} FROM tool_stock_tools_gold WHERE {column} = %s LIMIT 1",
+                (value,)
             )
             result = self.cursor.fetchone()
             
             if result:
-                strategy_data = ToolStockToolsGold(
-                    tool_stock_tools_gold_id=result['tool_stock_tools_gold_id'],
-                    auth=result.get('auth', ''),
-                    expire_time=result.get('expire_time'),
-                    deleted=result.get('deleted', 'F'),
-                    updater=result.get('updater', ''),
-                    creator=result.get('creator', ''),
-                    update_time=result.get('update_time'),
-                    create_time=result.get('create_time'),
-                    start_time=result.get('start_time'),
-                    end_time=result.get('end_time'),
-                    switched=result.get('switched', ''),
-                    total_cost=result.get('total_cost', 0.0),
-                    total_shares=result.get('total_shares', 0),
-                    history_max_profit=result.get('history_max_profit', 0.0),
-                    last_total_profit=result.get('last_total_profit', 0.0),
-                    position=result.get('position', '{}'),
-                    trade_history=result.get('trade_history', '[]'),
-                    last_trade_date=result.get('last_trade_date')
-                )
                 logger.info("用户信息加载成功")
-                return strategy_data
+                return self._row_to_entity(result)
             else:
                 logger.info("未找到用户信息记录")
                 return None
                 
         except Exception as e:
-            logger.error(f"加载用户信息失败: {e}")
-            return None
-        finally:
+            logger.error(f"{error_message}: {e}")
+            # 出错后丢弃连接，下次调用重新建立
             self.disconnect()
+            return None
+
+    @staticmethod
+    def _row_to_entity(result: dict) -> ToolStockToolsGold:
+        """将查询结果行转换为实体对象"""
+        return ToolStockToolsGold(
+            tool_stock_tools_gold_id=result['tool_stock_tools_gold_id'],
+            auth=result.get('auth', ''),
+            expire_time=result.get('expire_time'),
+            deleted=result.get('deleted', 'F'),
+            updater=result.get('updater', ''),
+            creator=result.get('creator', ''),
+            update_time=result.get('update_time'),
+            create_time=result.get('create_time'),
+            start_time=result.get('start_time'),
+            end_time=result.get('end_time'),
+            switched=result.get('switched', ''),
+            total_cost=result.get('total_cost', 0.0),
+            total_shares=result.get('total_shares', 0),
+            history_max_profit=result.get('history_max_profit', 0.0),
+            last_total_profit=result.get('last_total_profit', 0.0),
+            position=result.get('position', '{}'),
+            trade_history=result.get('trade_history', '[]'),
+            last_trade_date=result.get('last_trade_date')
+        )
+
+@lru_cache(maxsize=1)
+def get_strategy_dao() -> StrategyDAO:
+    """进程内共享的StrategyDAO实例，各模块不再各自创建"""
+    return StrategyDAO()
+
 
 # 使用示例
 if __name__ == "__main__":
@@ -11,11 +11,13 @@ data_fetcher.py
 """
 
 from typing import Optional
-import akshare as ak
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime
 import time, random
 
+# 与web端共用同一套行情拉取与缓存，同一区间只请求一次akshare
+from common_util import fetch_stock_hist, fetch_gold_hist, ohlcv_rename_map
+
 class DataFetcher:
     def __init__(self, retry: int = 2, retry_sleep: float = 1.0):
         """构造函数
@@ -26,6 +28,8 @@ class DataFetcher:
         """
         self.retry = retry
         self.retry_sleep = retry_sleep
+        # 重试抖动使用实例私有的随机数生成器，不触碰全局随机状态
+        self._rng = random.Random()
         print("✅ DataFetcher 初始化完成 (retry=%d, retry_sleep=%.2f)" % (retry, retry_sleep))
 
     def _standardize(self, df: pd.DataFrame) -> pd.DataFrame:
@@ -43,47 +47,42 @@ class DataFetcher:
             return pd.DataFrame()
         # 统一日期索引
         if '日期' in df.columns:
-            df['日期'] = pd.to_datetime(df['日期'])
+            df['日期'] = pd.to_datetime(df['日期'], format='%Y-%m-%d')
             df = df.set_index('日期', drop=False)
         elif not isinstance(df.index, pd.DatetimeIndex):  # 若索引不是日期尝试转换
             try:
                 df.index = pd.to_datetime(df.index)
             except Exception:
                 pass
-        # 英文列名 -> 中文列名映射
-        mapping = {
-            'open': '开盘','high':'最高','low':'最低','close':'收盘','volume':'成交量',
-            'Open':'开盘','High':'最高','Low':'最低','Close':'收盘','Volume':'成交量'
-        }
-        for src, dst in mapping.items():
-            if src in df.columns and dst not in df.columns:
-                df[dst] = df[src]
-        return df.sort_index()
+        # 英文列名 -> 中文列名，一次性重命名（已有中文列的不覆盖）
+        rename_map = ohlcv_rename_map(df.columns)
+        if rename_map:
+            df = df.rename(columns=rename_map)
+        return df if df.index.is_monotonic_increasing else df.sort_index()
 
-    def fetch_stock_hist(self, code: str, months: int = 12) -> pd.DataFrame:
+    def fetch_stock_hist(self, code: str, months: int = 12, use_cache: bool = True) -> pd.DataFrame:
         """获取 A 股股票历史日线（前复权）
         Args:
             code: 股票代码（例如 '002155'）
-            months: 向前抓取的月数（按 30 天近似换算）
+            months: 向前抓取的月数（按自然月回推）
+            use_cache: 是否使用 common_util 的行情缓存；为 False 时每次都向接口拉取最新数据
         Returns:
             标准化后的日线 DataFrame（包含至少收盘价等列）
         Raises:
             RuntimeError: 重试后仍失败时抛出异常
         注意：
-            - 使用 akshare.stock_zh_a_hist 接口，adjust='qfq'（前复权）
+            - 使用 akshare.stock_zh_a_hist 接口，adjust='qfq'（前复权），经 common_util 缓存
             - 若后续需要后复权或不复权，可增加参数支持
         """
-        end = datetime.now().strftime('%Y%m%d')
-        start = (datetime.now() - timedelta(days=months*30)).strftime('%Y%m%d')
         last_err = None
         for attempt in range(self.retry + 1):
             try:
-                df = ak.stock_zh_a_hist(symbol=code, period='daily', start_date=start, end_date=end, adjust='qfq')
+                df = fetch_stock_hist(code, months, use_cache=use_cache)
                 return self._standardize(df)
             except Exception as e:
                 last_err = e
                 # 重试前休眠（基础秒数 + 随机抖动）
-                time.sleep(self.retry_sleep + random.random())
+                time.sleep(self.retry_sleep + self._rng.random())
         # 所有尝试失败
         raise RuntimeError(f'获取股票{code}失败: {last_err}')
 
@@ -100,19 +99,21 @@ class DataFetcher:
         last_err = None
         for attempt in range(self.retry + 1):
             try:
-                df = ak.futures_foreign_hist(symbol='XAU')
+                df = fetch_gold_hist()
                 df = self._standardize(df)
-                cutoff = datetime.now() - timedelta(days=months*30)
-                df = df[df.index >= cutoff]
+                cutoff = datetime.now() - pd.DateOffset(months=months)
+                # _standardize 已按时间正序排列，二分定位截止位置后切片，不构造布尔掩码
+                df = df.iloc[df.index.searchsorted(cutoff, side='left'):]
                 return df
             except Exception as e:
                 last_err = e
-                time.sleep(self.retry_sleep + random.random())
+                time.sleep(self.retry_sleep + self._rng.random())
         raise RuntimeError(f'获取伦敦金失败: {last_err}')
 
     def fetch_realtime_quote(self, code: str) -> Optional[float]:
         """获取“实时”价格（占位实现）
-        当前实现：用最近一次日线收盘价代替实时价，避免接入复杂的行情源。
+        当前实现：用最近一次日线收盘价代替实时价，避免接入复杂的行情源；
+        不走行情缓存，每次调用都重新拉取。
         Args:
             code: 股票代码
         Returns:
@@ -120,9 +121,9 @@ class DataFetcher:
         后续扩展：可接入 websocket / level2 / 行情轮询接口。
         """
         try:
-            df = self.fetch_stock_hist(code, months=1)
+            df = self.fetch_stock_hist(code, months=1, use_cache=False)
             if not df.empty:
-                return float(df['收盘'].iloc[-1])
+                return float(df['收盘'].iat[-1])
         except Exception:
             return None
         return None
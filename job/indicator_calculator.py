@@ -186,29 +186,30 @@ class IndicatorCalculator:
         kdj = self._calc_kdj(df, **params['KDJ'])
         macd = self._calc_macd(df, **params['MACD'])
         rsi = self._calc_rsi(df, periods=params['RSI']['periods'])
-        # 最新价格信息
-        latest = df.iloc[-1]
+        # 最新价格信息：逐列用iat读取末行标量，不构造混合类型的整行Series
+        def latest(col):
+            return float(df[col].iat[-1]) if col in df.columns else 0.0
         price_info = {
-            'date': str(latest.get('日期', df.index[-1]) if '日期' in df.columns else df.index[-1]),
-            'open': float(latest.get('开盘', 0)),
-            'high': float(latest.get('最高', 0)),
-            'low': float(latest.get('最低', 0)),
-            'close': float(latest.get('收盘', 0)),
-            'volume': float(latest.get('成交量', 0))
+            'date': str(df['日期'].iat[-1] if '日期' in df.columns else df.index[-1]),
+            'open': latest('开盘'),
+            'high': latest('最高'),
+            'low': latest('最低'),
+            'close': latest('收盘'),
+            'volume': latest('成交量')
         }
         # 动态收集所有信号
         signals = {}
         if not kdj.empty and 'KDJ_GOLDEN_CROSS' in kdj.columns:
-            signals['kdj_golden_cross'] = bool(kdj['KDJ_GOLDEN_CROSS'].iloc[-1])
+            signals['kdj_golden_cross'] = bool(kdj['KDJ_GOLDEN_CROSS'].iat[-1])
         if not macd.empty and 'MACD_GOLDEN_CROSS' in macd.columns:
-            signals['macd_golden_cross'] = bool(macd['MACD_GOLDEN_CROSS'].iloc[-1])
+            signals['macd_golden_cross'] = bool(macd['MACD_GOLDEN_CROSS'].iat[-1])
         if not rsi.empty and 'RSI_OVERSOLD' in rsi.columns:
-            signals['rsi_oversold'] = bool(rsi['RSI_OVERSOLD'].iloc[-1])
+            signals['rsi_oversold'] = bool(rsi['RSI_OVERSOLD'].iat[-1])
         # 可扩展：自动收集所有以 _CROSS/_SIGNAL/_ALERT/_OVERSOLD/_OVERBOUGHT 结尾的布尔信号
         for df_ind in [kdj, macd, rsi]:
             for col in df_ind.columns:
                 if col.endswith(('_CROSS', '_SIGNAL', '_ALERT', '_OVERSOLD', '_OVERBOUGHT')) and col.lower() not in signals:
-                    val = df_ind[col].iloc[-1]
+                    val = df_ind[col].iat[-1]
                     if isinstance(val, (bool, np.bool_)) or (isinstance(val, (int, float)) and val in (0, 1)):
                         signals[col.lower()] = bool(val)
         return SignalEntity(stock_code, stock_name, price_info, signals, history=history, extra=extra)
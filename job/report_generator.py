@@ -9,8 +9,9 @@ report_generator.py
   3. 构建AI提示词（Toon格式和人类可读格式）
 """
 from typing import Dict, Any, List, Optional
+import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime
 import math
 import json  # 新增: 用于 JSON 格式化输出
 from job.indicator_calculator import SignalEntity
@@ -90,25 +91,29 @@ class ReportGenerator:
                 hist_df.index = pd.to_datetime(hist_df.index)
             except Exception:
                 pass
-        cutoff = datetime.now() - timedelta(days=months*30)
+        cutoff = datetime.now() - pd.DateOffset(months=months)
         df = hist_df[hist_df.index >= cutoff]
         if df.empty:
             return None
         series = df[col].dropna()
-        values = series.tolist()
-        dates_full = df.index.tolist()
-        n = len(values)
+        values = series.to_numpy(dtype=float)
+        n = values.size
+        if n == 0:
+            return None
         stride = math.ceil(n / max_points) if n > max_points else 1
         sampled_values = values[::stride]
-        sampled_dates = dates_full[::stride]
-        base = sampled_values[0]
+        # 日期直接在DatetimeIndex上切片，与去空值后的序列保持对齐，不转成Python对象列表
+        sampled_dates = series.index[::stride]
+        base = float(sampled_values[0])
         if base == 0:
-            base = next((v for v in sampled_values if v != 0), 1.0)
-        norm_seq = [int(round(v / base * 1000)) for v in sampled_values]
-        stats_min, stats_max = min(values), max(values)
-        stats_mean = sum(values)/n
-        stats_std = (sum((v-stats_mean)**2 for v in values)/(n-1))**0.5 if n>1 else 0.0
-        stats_ret = (values[-1]/values[0]-1.0) if values[0]!=0 else 0.0
+            non_zero = sampled_values[sampled_values != 0]
+            base = float(non_zero[0]) if non_zero.size else 1.0
+        # 归一化与统计均在ndarray上向量化计算（np.rint与round同为四舍六入五成双）
+        norm_seq = np.rint(sampled_values / base * 1000).astype(np.int64)
+        stats_min, stats_max = float(values.min()), float(values.max())
+        stats_mean = float(values.mean())
+        stats_std = float(values.std(ddof=1)) if n>1 else 0.0
+        stats_ret = float(values[-1]/values[0]-1.0) if values[0]!=0 else 0.0
         annual_factor = 365/(months*30) if months>0 else 1
         stats_vol = stats_std/stats_mean*math.sqrt(annual_factor) if stats_mean!=0 else 0.0
         out = {
@@ -127,8 +132,7 @@ class ReportGenerator:
         }
         if include_dates:
             # 日期序列压缩：YYYYMMDD，无分隔，逗号分隔列表
-            date_tokens = [d.strftime('%Y%m%d') for d in sampled_dates]
-            out['dates'] = ','.join(date_tokens)
+            out['dates'] = ','.join(sampled_dates.strftime('%Y%m%d'))
         return out
 
     # Toon 压缩提示词 -------------------------------------------------
@@ -107,14 +107,19 @@ class SimilarityAnalyzer:
         print(f"移动平均线窗口: {ma_windows}")
         # 保持传入的数据结构，勿覆盖为列表
         # 1. 数据缺失处理
+        # akshare返回的数据通常无缺失值，先检查再处理，避免无意义的整表拷贝
         if data_missing_handling == 2:  # 用前一天数据填充
             print("使用前一天数据填充缺失值...")
-            stock_data = stock_data.ffill()
-            gold_data = gold_data.ffill()
+            if self._has_missing(stock_data):
+                stock_data = stock_data.ffill()
+            if self._has_missing(gold_data):
+                gold_data = gold_data.ffill()
         elif data_missing_handling == 1:  # 跳过缺失数据
             print("跳过缺失数据...")
-            stock_data = stock_data.dropna()
-            gold_data = gold_data.dropna()
+            if self._has_missing(stock_data):
+                stock_data = stock_data.dropna()
+            if self._has_missing(gold_data):
+                gold_data = gold_data.dropna()
         # data_missing_handling == 0 时不处理，保持原样
         
         # 2. 平移天数处理
@@ -141,18 +146,9 @@ class SimilarityAnalyzer:
         if not has_gold_volume:
             print("金价数据无成交量，将跳过成交量相关计算")
         
-        # 计算日涨跌幅
-        stock_data['涨跌幅'] = stock_data['收盘'].pct_change()
-        gold_data['涨跌幅'] = gold_data['收盘'].pct_change()
-        
-        # 计算移动平均线
-        for window in ma_windows:
-            stock_data[f'MA{window}'] = stock_data['收盘'].rolling(window=window).mean()
-            gold_data[f'MA{window}'] = gold_data['收盘'].rolling(window=window).mean()
-        
-        # 计算波动率
-        stock_data['波动率'] = stock_data['涨跌幅'].rolling(window=5).std()
-        gold_data['波动率'] = gold_data['涨跌幅'].rolling(window=5).std()
+        # 计算日涨跌幅、移动平均线、波动率（一次性批量添加列）
+        stock_data = self._add_indicator_columns(stock_data, ma_windows)
+        gold_data = self._add_indicator_columns(gold_data, ma_windows)
         
         # 只删除必要的NaN值，保留更多数据
         # 删除前几行的NaN（由于移动平均线计算）
@@ -186,6 +182,27 @@ class SimilarityAnalyzer:
         
         return stock_data, gold_data, (has_stock_volume, has_gold_volume)
     
+    def _has_missing(self, data):
+        """是否存在缺失值（只做一次扫描，不产生数据拷贝）"""
+        return bool(data.isna().to_numpy().any())
+    
+    def _add_indicator_columns(self, data, ma_windows):
+        """
+        批量计算涨跌幅、移动平均线和波动率列
+        
+        先收集全部新列再一次assign，避免逐列插入导致的多次内部块拷贝，
+        同时不修改调用方传入的DataFrame
+        """
+        close = data['收盘']
+        change_rate = close.pct_change()
+        
+        new_columns = {'涨跌幅': change_rate}
+        for window in ma_windows:
+            new_columns[f'MA{window}'] = close.rolling(window=window).mean()
+        new_columns['波动率'] = change_rate.rolling(window=5).std()
+        
+        return data.assign(**new_columns)
+    
     def calculate_correlation_similarity(self, stock_data, gold_data):
         """
         计算价格变化相关性相似度
@@ -487,9 +504,9 @@ class SimilarityAnalyzer:
         for dimension, score in similarity_scores.items():
             comprehensive_score += score * self.weights[dimension]
         
-        # 计算每日相似度时间序列
-        daily_similarity_data = self.calculate_daily_similarity(
-            stock_data, gold_data, window_size, ma_windows, move_day, data_missing_handling
+        # 计算每日相似度时间序列（复用上面已预处理的数据，不再重复预处理）
+        daily_similarity_data = self._calculate_daily_similarity_processed(
+            stock_processed, gold_processed, has_volume_data, window_size
         )
         
         # 生成分析报告
@@ -527,13 +544,30 @@ class SimilarityAnalyzer:
         Returns:
             dict: 包含每日相似度数据的字典
         """
-        print(f"计算每日相似度，窗口大小: {window_size}")
-        
         # 数据预处理
         stock_processed, gold_processed, has_volume_data = self.preprocess_data(
             stock_data, gold_data, ma_windows, move_day, data_missing_handling
         )
         
+        return self._calculate_daily_similarity_processed(
+            stock_processed, gold_processed, has_volume_data, window_size
+        )
+    
+    def _calculate_daily_similarity_processed(self, stock_processed, gold_processed, has_volume_data, window_size=5):
+        """
+        基于已预处理的数据计算每日相似度时间序列
+        
+        Args:
+            stock_processed: preprocess_data处理后的股票数据
+            gold_processed: preprocess_data处理后的金价数据
+            has_volume_data: 成交量数据可用性 (股票, 金价)
+            window_size: 滑动窗口大小
+            
+        Returns:
+            dict: 包含每日相似度数据的字典
+        """
+        print(f"计算每日相似度，窗口大小: {window_size}")
+        
         # 确保数据长度一致
         min_length = min(len(stock_processed), len(gold_processed))
         stock_processed = stock_processed.iloc[-min_length:]
@@ -550,6 +584,13 @@ class SimilarityAnalyzer:
         daily_similarities = []
         dates = []
         
+        # 日期标签一次性格式化（DatetimeIndex走向量化strftime），循环内按下标取用
+        if isinstance(stock_processed.index, pd.DatetimeIndex):
+            date_labels = stock_processed.index.strftime('%Y-%m-%d').tolist()
+        else:
+            date_labels = [d.strftime('%Y-%m-%d') if hasattr(d, 'strftime') else str(d)
+                           for d in stock_processed.index]
+        
         # 使用滑动窗口计算每日相似度
         for i in range(window_size, len(stock_processed)):
             # 获取当前窗口的数据
@@ -583,20 +624,12 @@ class SimilarityAnalyzer:
                 )
                 
                 daily_similarities.append(round(daily_score, 2))
-                # 确保日期格式正确
-                if hasattr(stock_processed.index[i], 'strftime'):
-                    dates.append(stock_processed.index[i].strftime('%Y-%m-%d'))
-                else:
-                    dates.append(str(stock_processed.index[i]))
+                dates.append(date_labels[i])
                 
             except Exception as e:
                 print(f"   第{i}天相似度计算失败: {e}")
                 daily_similarities.append(0.0)
-                # 确保日期格式正确
-                if hasattr(stock_processed.index[i], 'strftime'):
-                    dates.append(stock_processed.index[i].strftime('%Y-%m-%d'))
-                else:
-                    dates.append(str(stock_processed.index[i]))
+                dates.append(date_labels[i])
         
         print(f"每日相似度计算完成，共{len(daily_similarities)}个数据点")
         if len(daily_similarities) > 0:
@@ -8,16 +8,40 @@
 import sys
 import os
 import json
-from datetime import datetime, timedelta
+import logging
+from datetime import datetime
 import time
+import numpy as np
 import pandas as pd
 
-# 添加数据库模块
-sys.path.insert(0, os.path.abspath('./database'))
-from database.strategy_dao import StrategyDAO
+# 添加数据库模块（已在路径中则不重复插入）
+DATABASE_DIR = os.path.abspath('./database')
+if DATABASE_DIR not in sys.path:
+    sys.path.insert(0, DATABASE_DIR)
+from database.strategy_dao import get_strategy_dao
 from common_util import CommonUtil
-strategy_dao = StrategyDAO()
 common_util = CommonUtil()
+logger = logging.getLogger(__name__)
+
+def _position_profit(total_shares, total_cost, current_price):
+    """
+    持仓盈亏计算（纯标量运算，供实盘判断与回测逐日循环共用）
+    
+    Returns:
+        tuple: (当前持仓市值, 当前总盈利, 当前盈利率)
+    """
+    market_value = total_shares * current_price
+    total_profit = market_value - total_cost
+    profit_rate = total_profit / total_cost if total_cost > 0 else 0
+    return market_value, total_profit, profit_rate
+
+
+def _profit_decrease_rate(history_max_profit, current_total_profit):
+    """盈利回调比例：相对历史最大盈利缩小的比例，历史最大盈利不为正时为0"""
+    if history_max_profit <= 0:
+        return 0
+    return (history_max_profit - current_total_profit) / history_max_profit
+
 
 class TradingStrategy:
     """
@@ -37,7 +61,7 @@ class TradingStrategy:
         # 默认用户标识
         self.user_id = 100001
         self.auth = 'abcdefaddd'
-        self.dao = StrategyDAO()
+        self.dao = get_strategy_dao()
         
         # 默认策略参数
         self.base_investment = 1000
@@ -177,10 +201,8 @@ class TradingStrategy:
                 print(f"[数据库] 未找到用户数据，使用默认值")
                 print(f"[数据库] 用户认证: {self.auth}")
         except Exception as e:
-            print(f"[数据库] 加载状态失败: {e}")
+            logger.exception("[数据库] 加载状态失败: %s", e)
             print(f"[数据库] 使用默认值继续运行")
-            import traceback
-            traceback.print_exc()
     
     def save_state(self):
         """保存策略状态到数据库"""
@@ -224,9 +246,7 @@ class TradingStrategy:
             else:
                 print(f"[数据库] 保存状态失败")
         except Exception as e:
-            print(f"[数据库] 保存状态失败: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("[数据库] 保存状态失败: %s", e)
     
     def should_buy_improved(self, gold_change_rate):
         """
@@ -240,7 +260,7 @@ class TradingStrategy:
         """
         # 检查金价涨幅是否达到最小阈值
         if gold_change_rate < self.min_gold_change:
-            print(f"金价涨幅{gold_change_rate*100:.2f}%未达到最小阈值{self.min_gold_change*100:.2f}%，不买入")
+            logger.debug("金价涨幅%.2f%%未达到最小阈值%.2f%%，不买入", gold_change_rate*100, self.min_gold_change*100)
             return False, 0
         
         # 计算买入金额，但设置合理的上限和下限
@@ -249,15 +269,15 @@ class TradingStrategy:
         # 确保买入金额不小于最小值
         if buy_amount < self.min_buy_amount:
             buy_amount = self.min_buy_amount
-            print(f"买入金额调整为最小金额: {buy_amount}元")
+            logger.debug("买入金额调整为最小金额: %s元", buy_amount)
         
         # 设置买入金额上限（不超过基础投资金额）
         max_buy_amount = self.base_investment * 1
         if buy_amount > max_buy_amount:
             buy_amount = max_buy_amount
-            print(f"买入金额调整为上限: {buy_amount}元")
+            logger.debug("买入金额调整为上限: %s元", buy_amount)
         
-        print(f"金价上涨{gold_change_rate*100:.2f}%，建议买入金额: {buy_amount:.2f}元")
+        logger.debug("金价上涨%.2f%%，建议买入金额: %.2f元", gold_change_rate*100, buy_amount)
         return True, buy_amount
     
     def should_sell_improved(self, current_price):
@@ -270,55 +290,80 @@ class TradingStrategy:
         Returns:
             tuple: (是否卖出, 卖出原因)
         """
-        # 计算当前持仓市值
-        current_market_value = self.total_shares * current_price
-        
-        # 计算当前总盈利
-        current_total_profit = current_market_value - self.total_cost
+        # 计算当前持仓市值、总盈利、盈利率
+        current_market_value, current_total_profit, current_profit_rate = _position_profit(
+            self.total_shares, self.total_cost, current_price
+        )
+        
+        logger.debug(
+            "当前状态检查: 总成本=%.2f元, 总持股=%.2f股, 当前持仓市值=%.2f元, 当前总盈利=%.2f元, "
+            "当前盈利率=%.2f%%, 历史最大盈利=%.2f元, 上一次总盈利=%.2f元",
+            self.total_cost, self.total_shares, current_market_value, current_total_profit,
+            current_profit_rate*100, self.history_max_profit, self.last_total_profit
+        )
+        
+        # 解析买入时间（用于长期持有检查）
+        buy_date = None
+        if self.current_position and 'buy_date' in self.current_position:
+            try:
+                if isinstance(self.current_position['buy_date'], str):
+                    buy_date = datetime.strptime(self.current_position['buy_date'], '%Y-%m-%d %H:%M:%S')
+                else:
+                    buy_date = self.current_position['buy_date']
+            except Exception as e:
+                logger.warning("计算持仓天数时出错: %s", e)
         
-        # 计算当前盈利率
-        current_profit_rate = current_total_profit / self.total_cost if self.total_cost > 0 else 0
+        return self._evaluate_sell_rules(
+            self.total_shares, self.total_cost, self.history_max_profit,
+            current_price, buy_date, datetime.now(), verbose=True
+        )
+    
+    def _evaluate_sell_rules(self, total_shares, total_cost, history_max_profit,
+                             current_price, buy_date, as_of, verbose=False):
+        """
+        卖出规则判断（实盘与回测共用同一套规则）
         
-        print(f"当前状态检查:")
-        print(f"  总成本: {self.total_cost:.2f}元")
-        print(f"  总持股: {self.total_shares:.2f}股")
-        print(f"  当前持仓市值: {current_market_value:.2f}元")
-        print(f"  当前总盈利: {current_total_profit:.2f}元")
-        print(f"  当前盈利率: {current_profit_rate*100:.2f}%")
-        print(f"  历史最大盈利: {self.history_max_profit:.2f}元")
-        print(f"  上一次总盈利: {self.last_total_profit:.2f}元")
+        Args:
+            total_shares: 总持股数量
+            total_cost: 总成本
+            history_max_profit: 历史最大盈利金额
+            current_price: 当前价格
+            buy_date: 买入时间，无持仓信息时为None
+            as_of: 计算持仓天数的参考时刻
+            verbose: 是否输出盈利回调检查明细（debug日志）
+            
+        Returns:
+            tuple: (是否卖出, 卖出原因)
+        """
+        _, current_total_profit, current_profit_rate = _position_profit(
+            total_shares, total_cost, current_price
+        )
         
         # 1. 止损检查
         if current_profit_rate <= -self.stop_loss_rate:
             return True, f"止损：当前亏损{abs(current_profit_rate)*100:.2f}%"
         
-        # 2. 盈利回调检查（修复版）
-        if self.history_max_profit > 0:  # 只有当历史最大盈利大于0时才检查回调
-            # 计算盈利缩小的金额
-            profit_decrease = self.history_max_profit - current_total_profit
-            # 计算盈利缩小的比例
-            profit_decrease_rate = profit_decrease / self.history_max_profit if self.history_max_profit > 0 else 0
+        # 2. 盈利回调检查（只有当历史最大盈利大于0时才检查回调）
+        if history_max_profit > 0:
+            profit_decrease_rate = _profit_decrease_rate(history_max_profit, current_total_profit)
             
-            print(f"盈利回调检查:")
-            print(f"  盈利缩小金额: {profit_decrease:.2f}元")
-            print(f"  盈利缩小比例: {profit_decrease_rate*100:.2f}%")
-            print(f"  盈利回调阈值: {self.profit_callback_rate*100:.2f}%")
+            if verbose:
+                logger.debug(
+                    "盈利回调检查: 盈利缩小金额=%.2f元, 盈利缩小比例=%.2f%%, 盈利回调阈值=%.2f%%",
+                    history_max_profit - current_total_profit, profit_decrease_rate*100, self.profit_callback_rate*100
+                )
             
             if profit_decrease_rate >= self.profit_callback_rate:
-                return True, f"盈利回调：从{self.history_max_profit:.2f}元回调到{current_total_profit:.2f}元，缩小{profit_decrease_rate*100:.2f}%"
+                return True, f"盈利回调：从{history_max_profit:.2f}元回调到{current_total_profit:.2f}元，缩小{profit_decrease_rate*100:.2f}%"
         
         # 3. 长期持有检查（超过max_hold_days天强制卖出）
-        if self.current_position and 'buy_date' in self.current_position:
+        if buy_date is not None:
             try:
-                if isinstance(self.current_position['buy_date'], str):
-                    buy_date = datetime.strptime(self.current_position['buy_date'], '%Y-%m-%d %H:%M:%S')
-                else:
-                    buy_date = self.current_position['buy_date']
-                days_held = (datetime.now() - buy_date).days
+                days_held = (as_of - buy_date).days
                 if days_held > self.max_hold_days:
                     return True, f"长期持有：已持有{days_held}天"
             except Exception as e:
-                print(f"计算持仓天数时出错: {e}")
+                logger.warning("计算持仓天数时出错: %s", e)
         
         # 4. 大幅盈利检查（盈利超过max_profit_rate%时考虑卖出）
         if current_profit_rate > self.max_profit_rate:
@@ -356,16 +401,18 @@ class TradingStrategy:
             if not self.can_trade_today():
                 return {'error': '今天已经交易过，避免频繁交易'}
             
-            # 2. 获取并验证金价数据
-            gold_data = common_util.get_gold_data()
+            # 2. 并发获取股票与金价数据，并验证金价数据
+            stock_data, gold_data = common_util.get_stock_and_gold_data(stock_code=stock_code)
             price_columns = ['收盘', 'close', 'Close', 'CLOSE', '价格', 'price']
             current_gold_price = None
             previous_gold_price = None
             
             for col in price_columns:
                 if col in gold_data.columns:
-                    current_gold_price = float(gold_data.iloc[-1][col])
-                    previous_gold_price = float(gold_data.iloc[-2][col])
+                    # 先取列再用iat读标量，避免iloc[-1]整行构造Series
+                    price_series = gold_data[col]
+                    current_gold_price = float(price_series.iat[-1])
+                    previous_gold_price = float(price_series.iat[-2])
                     print(f"使用列名 '{col}' 获取价格数据")
                     break
             
@@ -376,9 +423,9 @@ class TradingStrategy:
             print(f"金价涨跌幅: {gold_change_rate*100:.2f}%")
             
             # 3. 获取股票价格
-            current_stock_price = common_util.get_gold_data(stock_code)
-            if current_stock_price is None:
+            if stock_data is None or stock_data.empty:
                 return {'error': '无法获取股票数据'}
+            current_stock_price = float(stock_data['收盘'].iat[-1])
             
             # 4. 执行改进的买入逻辑
             should_buy, buy_amount = self.should_buy_improved(gold_change_rate)
@@ -518,9 +565,7 @@ class TradingStrategy:
             
         except Exception as e:
             error_msg = f'策略执行失败: {str(e)}'
-            print(f"[错误] {error_msg}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("[错误] %s", error_msg)
             return {'error': error_msg}
     
     def get_strategy_status_improved(self, refresh_from_db=False, stock_code='002155'):
@@ -553,9 +598,9 @@ class TradingStrategy:
                 }
             
             # 计算当前状态
-            current_market_value = self.total_shares * current_price
-            current_total_profit = current_market_value - self.total_cost
-            current_profit_rate = current_total_profit / self.total_cost if self.total_cost > 0 else 0
+            current_market_value, current_total_profit, current_profit_rate = _position_profit(
+                self.total_shares, self.total_cost, current_price
+            )
             
             return {
                 'has_position': True,
@@ -586,18 +631,14 @@ class TradingStrategy:
         if refresh_from_db:
             self.load_state()
         
-        total_trades = len(self.trade_history)
-        total_net_profit = sum([trade.get('total_profit', 0) for trade in self.trade_history])
-        total_transaction_cost = sum([trade.get('transaction_cost', 0) for trade in self.trade_history])
-        win_trades = len([trade for trade in self.trade_history if trade.get('total_profit', 0) > 0])
-        win_rate = (win_trades / total_trades * 100) if total_trades > 0 else 0
+        trade_stats = self._summarize_trades(self.trade_history)
         
         return {
-            'total_trades': total_trades,
-            'total_net_profit': total_net_profit,
-            'total_transaction_cost': total_transaction_cost,
-            'win_trades': win_trades,
-            'win_rate': win_rate,
+            'total_trades': trade_stats['total_trades'],
+            'total_net_profit': trade_stats['total_net_profit'],
+            'total_transaction_cost': trade_stats['total_transaction_cost'],
+            'win_trades': trade_stats['win_trades'],
+            'win_rate': trade_stats['win_rate'],
             'current_position': self.total_shares > 0,
             'total_shares': self.total_shares,
             'total_cost': self.total_cost,
@@ -605,6 +646,29 @@ class TradingStrategy:
             'last_trade_date': self.last_trade_date.strftime('%Y-%m-%d') if self.last_trade_date else None
         }
 
+    def _summarize_trades(self, trade_history):
+        """
+        汇总交易记录统计
+        
+        先把盈利、交易成本按列提取为ndarray（列式存储），再做向量化求和/计数，
+        避免对交易记录列表做多次逐条遍历
+        
+        Returns:
+            dict: total_trades, total_net_profit, total_transaction_cost, win_trades, win_rate
+        """
+        total_trades = len(trade_history)
+        profits = np.fromiter((trade.get('total_profit', 0) for trade in trade_history), dtype=float, count=total_trades)
+        costs = np.fromiter((trade.get('transaction_cost', 0) for trade in trade_history), dtype=float, count=total_trades)
+        win_trades = int(np.count_nonzero(profits > 0))
+        
+        return {
+            'total_trades': total_trades,
+            'total_net_profit': float(profits.sum()),
+            'total_transaction_cost': float(costs.sum()),
+            'win_trades': win_trades,
+            'win_rate': (win_trades / total_trades * 100) if total_trades > 0 else 0
+        }
+    
     def run_backtest(self, stock_code='002155', months=6):
         """
         运行历史回测
@@ -627,23 +691,19 @@ class TradingStrategy:
         try:
             # 计算回测日期范围
             end_dt = datetime.now()
-            start_dt = end_dt - timedelta(days=months * 30)
+            start_dt = end_dt - pd.DateOffset(months=months)
             
             print(f"回测时间范围: {start_dt.strftime('%Y-%m-%d')} 到 {end_dt.strftime('%Y-%m-%d')}")
             
-            # 获取历史数据
-            print("正在获取历史股票数据...")
-            stock_data = common_util.get_stock_data(stock_code=stock_code, months=months)
+            # 并发获取历史股票数据和金价数据
+            print("正在获取历史股票数据和金价数据...")
+            stock_data, gold_data = common_util.get_stock_and_gold_data(months=months, stock_code=stock_code)
             
             if stock_data is None or stock_data.empty:
                 return {'error': '无法获取股票历史数据'}
             
             print(f"获取到股票数据: {len(stock_data)}条记录")
             
-            # 获取历史金价数据
-            print("正在获取历史金价数据...")
-            gold_data = common_util.get_gold_data(months=months)
-            
             if gold_data is None or gold_data.empty:
                 return {'error': '无法获取金价历史数据'}
             
@@ -658,31 +718,39 @@ class TradingStrategy:
                 'last_total_profit': 0,
                 'current_position': None,
                 'trade_history': [],
-                'last_trade_date': None
+                'last_trade_date': None,
+                'buy_datetime': None,
+                # 持仓天数的参考时刻，整个回测只取一次当前时间
+                'as_of': end_dt
             }
             
             # 收益曲线数据
             profit_curve = []
-            daily_returns = []
             
-            # 按日期遍历进行回测
-            for i, (date, row) in enumerate(stock_data.iterrows()):
-                current_date = date.date()
-                current_stock_price = float(row['收盘'])
-                
-                # 获取对应日期的金价数据
-                gold_price_data = self._get_gold_price_for_date(gold_data, current_date)
-                if gold_price_data is None:
-                    continue
-                
-                current_gold_price = gold_price_data['current']
-                previous_gold_price = gold_price_data['previous']
-                
-                if previous_gold_price is None or previous_gold_price == 0:
-                    continue
-                
-                # 计算金价涨跌幅
-                gold_change_rate = (current_gold_price - previous_gold_price) / previous_gold_price
+            # 收盘价取出为ndarray，避免逐行iterrows构造Series
+            stock_closes = stock_data['收盘'].to_numpy(dtype=float)
+            # 一次性把金价对齐到全部交易日
+            gold_currents, gold_previouses, has_previous_gold = self._align_gold_prices(gold_data, stock_data.index)
+            
+            # 批量预计算：有效交易日（存在前一条且非零的金价）、金价涨跌幅、日期
+            valid_bars = has_previous_gold & (gold_previouses != 0)
+            gold_change_rates = np.zeros_like(gold_currents)
+            np.divide(gold_currents - gold_previouses, gold_previouses, out=gold_change_rates, where=valid_bars)
+            bar_dates = stock_data.index.date
+            bar_date_strs = stock_data.index.strftime('%Y-%m-%d')
+            bar_indices = np.flatnonzero(valid_bars)
+            
+            # 日收益率（仅统计参与回测的交易日，首日无前值）
+            return_indices = bar_indices[bar_indices > 0]
+            daily_returns = ((stock_closes[return_indices] - stock_closes[return_indices - 1])
+                             / stock_closes[return_indices - 1]).tolist()
+            
+            # 按日期遍历有效交易日进行回测（逐日依赖持仓状态，需顺序执行）
+            for i in bar_indices:
+                current_date = bar_dates[i]
+                current_stock_price = float(stock_closes[i])
+                current_gold_price = float(gold_currents[i])
+                gold_change_rate = float(gold_change_rates[i])
                 
                 # 执行交易逻辑
                 trade_result = self._execute_backtest_trade(
@@ -691,9 +759,9 @@ class TradingStrategy:
                 )
                 
                 # 计算当前总资产和收益
-                current_market_value = backtest_state['total_shares'] * current_stock_price
-                current_total_profit = current_market_value - backtest_state['total_cost']
-                current_profit_rate = current_total_profit / backtest_state['total_cost'] if backtest_state['total_cost'] > 0 else 0
+                current_market_value, current_total_profit, current_profit_rate = _position_profit(
+                    backtest_state['total_shares'], backtest_state['total_cost'], current_stock_price
+                )
                 
                 # 更新历史最大盈利
                 if current_total_profit > backtest_state['history_max_profit']:
@@ -701,7 +769,7 @@ class TradingStrategy:
                 
                 # 记录收益曲线数据
                 profit_curve.append({
-                    'date': current_date.strftime('%Y-%m-%d'),
+                    'date': bar_date_strs[i],
                     'total_cost': backtest_state['total_cost'],
                     'market_value': current_market_value,
                     'total_profit': current_total_profit,
@@ -712,17 +780,13 @@ class TradingStrategy:
                     'has_position': backtest_state['total_shares'] > 0,
                     'trade_action': trade_result.get('action', 'HOLD')
                 })
-                
-                # 记录日收益率
-                if i > 0:
-                    daily_return = (current_stock_price - stock_data.iloc[i-1]['收盘']) / stock_data.iloc[i-1]['收盘']
-                    daily_returns.append(daily_return)
             
             # 计算回测统计
-            total_trades = len(backtest_state['trade_history'])
-            total_net_profit = sum([trade.get('total_profit', 0) for trade in backtest_state['trade_history']])
-            win_trades = len([trade for trade in backtest_state['trade_history'] if trade.get('total_profit', 0) > 0])
-            win_rate = (win_trades / total_trades * 100) if total_trades > 0 else 0
+            trade_stats = self._summarize_trades(backtest_state['trade_history'])
+            total_trades = trade_stats['total_trades']
+            total_net_profit = trade_stats['total_net_profit']
+            win_trades = trade_stats['win_trades']
+            win_rate = trade_stats['win_rate']
             
             # 计算年化收益率
             days = (end_dt - start_dt).days
@@ -762,52 +826,33 @@ class TradingStrategy:
             
         except Exception as e:
             error_msg = f'回测失败: {str(e)}'
-            print(f"[错误] {error_msg}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("[错误] %s", error_msg)
             return {'error': error_msg}
     
-    def _get_gold_price_for_date(self, gold_data, target_date):
-        """获取指定日期的金价数据"""
-        try:
-            # 找到最接近目标日期的金价数据
-            gold_data['date'] = pd.to_datetime(gold_data.index).date
-            
-            # 查找目标日期或之前最近的数据
-            available_dates = gold_data[gold_data['date'] <= target_date]
-            if available_dates.empty:
-                return None
-            
-            # 获取当前日期和前一天的数据
-            current_data = available_dates.iloc[-1]
-            previous_data = available_dates.iloc[-2] if len(available_dates) > 1 else None
-            
-            # 尝试不同的价格列名
-            price_columns = ['收盘', 'close', 'Close', 'CLOSE', '价格', 'price']
-            current_price = None
-            previous_price = None
-            
-            for col in price_columns:
-                if col in current_data:
-                    current_price = float(current_data[col])
-                    if previous_data is not None and col in previous_data:
-                        previous_price = float(previous_data[col])
-                    break
-            
-            if current_price is None:
-                # 如果列名匹配失败，使用第二列（通常是价格）
-                current_price = float(current_data.iloc[1])
-                if previous_data is not None:
-                    previous_price = float(previous_data.iloc[1])
-            
-            return {
-                'current': current_price,
-                'previous': previous_price
-            }
-            
-        except Exception as e:
-            print(f"获取金价数据失败: {e}")
-            return None
+    def _align_gold_prices(self, gold_data, stock_index):
+        """
+        将金价按日期对齐到股票交易日：每个交易日取当日或之前最近一条金价及其前一条
+        
+        gold_data需按日期升序排列，全部交易日通过一次searchsorted完成查找
+        
+        Returns:
+            tuple: (当前金价数组, 前一条金价数组, 是否存在前一条金价的布尔数组)
+        """
+        gold_dates = pd.DatetimeIndex(pd.to_datetime(gold_data.index)).normalize()
+        stock_dates = pd.DatetimeIndex(stock_index).normalize()
+        positions = gold_dates.searchsorted(stock_dates, side='right')
+        
+        # 尝试不同的价格列名，匹配失败时使用第二列（通常是价格）
+        price_columns = ['收盘', 'close', 'Close', 'CLOSE', '价格', 'price']
+        price_column = next((col for col in price_columns if col in gold_data.columns), None)
+        if price_column is not None:
+            gold_closes = gold_data[price_column].to_numpy(dtype=float)
+        else:
+            gold_closes = gold_data.iloc[:, 1].to_numpy(dtype=float)
+        
+        current_prices = gold_closes[np.maximum(positions - 1, 0)]
+        previous_prices = gold_closes[np.maximum(positions - 2, 0)]
+        return current_prices, previous_prices, positions >= 2
     
     def _execute_backtest_trade(self, backtest_state, current_date, current_stock_price, gold_change_rate, current_gold_price):
         """执行回测交易逻辑"""
@@ -833,7 +878,11 @@ class TradingStrategy:
             backtest_state['total_shares'] += shares
             backtest_state['total_investment'] += buy_amount
             
+            # 买入时刻同时保留datetime对象，持仓天数判断时无需再解析字符串
+            buy_datetime = datetime(current_date.year, current_date.month, current_date.day)
+            
             # 记录当前持仓信息
+            backtest_state['buy_datetime'] = buy_datetime
             backtest_state['current_position'] = {
                 'has_position': True,
                 'buy_price': current_stock_price,
@@ -841,7 +890,7 @@ class TradingStrategy:
                 'buy_amount': buy_amount,
                 'net_buy_amount': net_buy_amount,
                 'transaction_cost': transaction_cost,
-                'buy_date': current_date.strftime('%Y-%m-%d %H:%M:%S'),
+                'buy_date': buy_datetime.strftime('%Y-%m-%d %H:%M:%S'),
                 'max_profit_rate': 0,
                 'current_profit_rate': 0
             }
@@ -888,64 +937,28 @@ class TradingStrategy:
             backtest_state['total_shares'] = 0
             backtest_state['total_cost'] = 0
             backtest_state['current_position'] = None
+            backtest_state['buy_datetime'] = None
         
         return trade_result
     
     def _should_sell_backtest(self, backtest_state, current_price):
         """回测中的卖出判断逻辑"""
-        # 计算当前持仓市值
-        current_market_value = backtest_state['total_shares'] * current_price
-        
-        # 计算当前总盈利
-        current_total_profit = current_market_value - backtest_state['total_cost']
-        
-        # 计算当前盈利率
-        current_profit_rate = current_total_profit / backtest_state['total_cost'] if backtest_state['total_cost'] > 0 else 0
-        
-        # 1. 止损检查
-        if current_profit_rate <= -self.stop_loss_rate:
-            return True, f"止损：当前亏损{abs(current_profit_rate)*100:.2f}%"
-        
-        # 2. 盈利回调检查
-        if backtest_state['history_max_profit'] > 0:
-            profit_decrease = backtest_state['history_max_profit'] - current_total_profit
-            profit_decrease_rate = profit_decrease / backtest_state['history_max_profit'] if backtest_state['history_max_profit'] > 0 else 0
-            
-            if profit_decrease_rate >= self.profit_callback_rate:
-                return True, f"盈利回调：从{backtest_state['history_max_profit']:.2f}元回调到{current_total_profit:.2f}元，缩小{profit_decrease_rate*100:.2f}%"
-        
-        # 3. 长期持有检查
-        if backtest_state['current_position'] and 'buy_date' in backtest_state['current_position']:
-            try:
-                buy_date = datetime.strptime(backtest_state['current_position']['buy_date'], '%Y-%m-%d %H:%M:%S')
-                days_held = (datetime.now() - buy_date).days
-                if days_held > self.max_hold_days:
-                    return True, f"长期持有：已持有{days_held}天"
-            except Exception as e:
-                print(f"计算持仓天数时出错: {e}")
-        
-        # 4. 大幅盈利检查
-        if current_profit_rate > self.max_profit_rate:
-            return True, f"大幅盈利：当前盈利{current_profit_rate*100:.2f}%"
-        
-        return False, "继续持有"
+        buy_date = backtest_state.get('buy_datetime') if backtest_state['current_position'] else None
+        return self._evaluate_sell_rules(
+            backtest_state['total_shares'], backtest_state['total_cost'], backtest_state['history_max_profit'],
+            current_price, buy_date, backtest_state.get('as_of') or datetime.now()
+        )
     
     def _calculate_max_drawdown(self, profit_curve):
         """计算最大回撤"""
         if not profit_curve:
             return 0
         
-        max_drawdown = 0
-        peak_value = profit_curve[0]['market_value']
-        
-        for point in profit_curve:
-            market_value = point['market_value']
-            if market_value > peak_value:
-                peak_value = market_value
-            
-            drawdown = (peak_value - market_value) / peak_value if peak_value > 0 else 0
-            if drawdown > max_drawdown:
-                max_drawdown = drawdown
+        market_values = np.fromiter((point['market_value'] for point in profit_curve), dtype=float, count=len(profit_curve))
+        # 历史峰值（累计最大值），峰值非正时回撤记为0
+        peak_values = np.maximum.accumulate(market_values)
+        drawdowns = np.zeros_like(market_values)
+        np.divide(peak_values - market_values, peak_values, out=drawdowns, where=peak_values > 0)
+        max_drawdown = max(float(drawdowns.max()), 0)
         
         return max_drawdown * 100  # 转换为百分比
-
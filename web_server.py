@@ -10,6 +10,10 @@ from flask import Flask, render_template, request, jsonify, send_file
 # 配置参数
 import math
 from decimal import Decimal
+from itertools import compress
+from types import MappingProxyType
+import numpy as np
+import pandas as pd
 
 app = Flask(__name__, static_folder='templates', static_url_path='')
 
@@ -38,6 +42,19 @@ gold_stocks = [
         {"code": "600362", "name": "江西铜业", "sector": "有色金属"},
         {"code": "000630", "name": "铜陵有色", "sector": "有色金属"}
     ]
+# 股票代码 -> 名称映射，导入时构建一次，查询为O(1)；只读视图，防止被请求处理代码意外修改
+stock_names = MappingProxyType({stock['code']: stock['name'] for stock in gold_stocks})
+
+
+def _clean_nan(value):
+    """清理NaN值，如果为NaN则报错，并转换Decimal为float（确保JSON序列化正常）"""
+    # 转换Decimal为float
+    if isinstance(value, Decimal):
+        value = float(value)
+    
+    if isinstance(value, float) and math.isnan(value):
+        raise ValueError(f"数据包含NaN值: {value}")
+    return value
 
 @app.route('/')
 def index():
@@ -99,8 +116,7 @@ def analyze_stock():
             trade_points = []
         
         # 加载需要的数据
-        stock_data = common_util.get_stock_data(months=months, stock_code=stock_code)
-        gold_data = common_util.get_gold_data(months=months)
+        stock_data, gold_data = common_util.get_stock_and_gold_data(months=months, stock_code=stock_code)
         if stock_data is None or getattr(stock_data, 'empty', True):
             return jsonify({
                 'success': False,
@@ -165,8 +181,7 @@ def analyze_similarity():
             })
         
         # 从数据提供层获取数据，避免依赖未定义的实例属性
-        stock_data = common_util.get_stock_data(months=months, stock_code=stock_code)
-        gold_data = common_util.get_gold_data(months=months)
+        stock_data, gold_data = common_util.get_stock_and_gold_data(months=months, stock_code=stock_code)
         
         if stock_data is None or stock_data.empty:
             return jsonify({
@@ -197,7 +212,7 @@ def analyze_similarity():
         similarity_chart_data = similarity_analyzer.create_similarity_chart(analysis_result)
         
         # 从股票列表中，根据股票代码，获取股票名称
-        stock_name = next((stock['name'] for stock in gold_stocks if stock['code'] == stock_code), '未知股票')
+        stock_name = stock_names.get(stock_code, '未知股票')
 
         return jsonify({
             'success': True,
@@ -246,17 +261,6 @@ def get_current_status():
                 'error': '股票价格数据异常，请重试'
             })
         
-        # 处理NaN值，确保JSON序列化正常
-        def clean_nan(value):
-            """清理NaN值，如果为NaN则报错，并转换Decimal为float"""
-            # 转换Decimal为float
-            if isinstance(value, Decimal):
-                value = float(value)
-            
-            if isinstance(value, float) and math.isnan(value):
-                raise ValueError(f"数据包含NaN值: {value}")
-            return value
-        
         # 检查数据完整性
         required_fields = ['current_price', 'stock_change_rate', 'gold_price', 'gold_change_rate']
         for field in required_fields:
@@ -269,11 +273,11 @@ def get_current_status():
         try:
             cleaned_status = {
                 # 实时数据
-                'current_price': clean_nan(status['current_price']),
-                'stock_change_rate': clean_nan(status['stock_change_rate']),
-                'gold_price': clean_nan(status['gold_price']),
-                'gold_change_rate': clean_nan(status['gold_change_rate']),
-                'total_assets': clean_nan(status.get('total_assets', 0)),
+                'current_price': _clean_nan(status['current_price']),
+                'stock_change_rate': _clean_nan(status['stock_change_rate']),
+                'gold_price': _clean_nan(status['gold_price']),
+                'gold_change_rate': _clean_nan(status['gold_change_rate']),
+                'total_assets': _clean_nan(status.get('total_assets', 0)),
                 
                 # 持久化数据（来自JSON文件）
                 'total_cost': status.get('total_cost', 0),
@@ -593,38 +597,35 @@ def run_backtest():
                 # 重取一次股票数据（与回测一致的区间）
                 stock_df = common_util.get_stock_data(stock_code=stock_code, months=months)
                 if start_date and end_date and stock_df is not None and not stock_df.empty:
-                    import pandas as pd
                     try:
                         stock_df = stock_df.loc[(stock_df.index >= pd.to_datetime(start_date)) & (stock_df.index <= pd.to_datetime(end_date))]
                     except Exception:
                         pass
 
-                # 构建OHLC按照profit_curve日期对齐，若当日缺失则跳过
-                dates = []
-                open_list, high_list, low_list, close_list = [], [], [], []
-                for point in profit_curve:
-                    d = point.get('date')
-                    if not d:
-                        continue
-                    dates.append(d)
-                    if stock_df is not None and not stock_df.empty and d in stock_df.index.strftime('%Y-%m-%d').tolist():
-                        # 定位到该日期的行
-                        try:
-                            row = stock_df.loc[pd.to_datetime(d)]
-                        except Exception:
-                            row = None
-                        if row is not None:
-                            open_list.append(float(row.get('开盘', row.get('open', row.get('Open', 0)))))
-                            high_list.append(float(row.get('最高', row.get('high', row.get('High', 0)))))
-                            low_list.append(float(row.get('最低', row.get('low', row.get('Low', 0)))))
-                            close_list.append(float(row.get('收盘', row.get('close', row.get('Close', 0)))))
-                        else:
-                            # 回退到profit_curve提供的收盘价
-                            cp = float(point.get('stock_price', 0))
-                            open_list.append(cp); high_list.append(cp); low_list.append(cp); close_list.append(cp)
-                    else:
-                        cp = float(point.get('stock_price', 0))
-                        open_list.append(cp); high_list.append(cp); low_list.append(cp); close_list.append(cp)
+                # 构建OHLC按照profit_curve日期对齐（一次reindex完成），若当日缺失则回退到收盘价
+                points = [point for point in profit_curve if point.get('date')]
+                dates = [point['date'] for point in points]
+                fallback_prices = np.array([float(point.get('stock_price', 0)) for point in points], dtype=float)
+                ohlc_columns = {
+                    'open': ('开盘', 'open', 'Open'),
+                    'high': ('最高', 'high', 'High'),
+                    'low': ('最低', 'low', 'Low'),
+                    'close': ('收盘', 'close', 'Close')
+                }
+                ohlc_lists = {}
+                if stock_df is not None and not stock_df.empty:
+                    stock_dates = stock_df.index.strftime('%Y-%m-%d')
+                    aligned_df = stock_df.set_axis(stock_dates).reindex(dates)
+                    matched = np.asarray(pd.Index(dates).isin(stock_dates))
+                    for key, candidates in ohlc_columns.items():
+                        column = next((c for c in candidates if c in aligned_df.columns), None)
+                        values = aligned_df[column].to_numpy(dtype=float) if column else np.zeros(len(dates))
+                        ohlc_lists[key] = np.where(matched, values, fallback_prices).tolist()
+                else:
+                    for key in ohlc_columns:
+                        ohlc_lists[key] = fallback_prices.tolist()
+                open_list, high_list = ohlc_lists['open'], ohlc_lists['high']
+                low_list, close_list = ohlc_lists['low'], ohlc_lists['close']
 
                 # 交易点：来自profit_curve.trade_action 与 stock_price
                 trades = []
@@ -683,14 +684,15 @@ def create_backtest_chart(profit_curve, stock_code):
         if not profit_curve:
             return None
         
-        # 提取数据
-        dates = [point['date'] for point in profit_curve]
-        market_values = [point['market_value'] for point in profit_curve]
-        total_costs = [point['total_cost'] for point in profit_curve]
-        profit_rates = [point['profit_rate'] * 100 for point in profit_curve]  # 转换为百分比
-        stock_prices = [point['stock_price'] for point in profit_curve]
-        gold_prices = [point['gold_price'] for point in profit_curve]
-        trade_actions = [point['trade_action'] for point in profit_curve]
+        # 提取数据：一次遍历转置为按列存储的列表
+        # 注意保持list而非ndarray，新版plotly会把ndarray序列化为前端plotly.js 2.26无法解析的二进制格式
+        dates, market_values, total_costs, stock_prices, gold_prices, trade_actions = (
+            list(column) for column in zip(*(
+                (point['date'], point['market_value'], point['total_cost'],
+                 point['stock_price'], point['gold_price'], point['trade_action'])
+                for point in profit_curve
+            ))
+        )
         
         # 创建子图
         fig = make_subplots(
@@ -721,11 +723,10 @@ def create_backtest_chart(profit_curve, stock_code):
         ), row=1, col=1)
         
         # 添加交易点标记
-        buy_dates = [dates[i] for i, action in enumerate(trade_actions) if action == 'BUY']
-        buy_values = [market_values[i] for i, action in enumerate(trade_actions) if action == 'BUY']
-        
-        sell_dates = [dates[i] for i, action in enumerate(trade_actions) if action == 'SELL']
-        sell_values = [market_values[i] for i, action in enumerate(trade_actions) if action == 'SELL']
+        buy_flags = [action == 'BUY' for action in trade_actions]
+        sell_flags = [action == 'SELL' for action in trade_actions]
+        buy_dates, buy_values = list(compress(dates, buy_flags)), list(compress(market_values, buy_flags))
+        sell_dates, sell_values = list(compress(dates, sell_flags)), list(compress(market_values, sell_flags))
         
         if buy_dates:
             fig.add_trace(go.Scatter(